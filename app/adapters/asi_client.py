@@ -1,15 +1,32 @@
 import httpx
 from typing import List, Dict
-from app.config.settings import ASI_API_KEY, SUBJECT_MATTER
+from app.adapters.http_pool import HttpPool
+from app.adapters.resilience import Bulkhead, Resilience
+from app.config.settings import (
+    ASI_API_KEY, ASI_HTTP_MAX_CONNECTIONS, ASI_HTTP_MAX_KEEPALIVE, ASI_HTTP_KEEPALIVE_EXPIRY, ASI_HTTP2,
+    ASI_MAX_IN_FLIGHT, ASI_MAX_QUEUE, SUBJECT_MATTER,
+)
 
 ASI_BASE = "https://api.asi1.ai/v1"
 
 class ASIClient:
     def __init__(self):
-        self._client = httpx.AsyncClient(base_url=ASI_BASE, headers={
-            "Authorization": f"Bearer {ASI_API_KEY}",
-            "Content-Type": "application/json",
-        }, timeout=30)
+        self.pool = HttpPool(
+            "asi", ASI_BASE,
+            max_connections=ASI_HTTP_MAX_CONNECTIONS,
+            max_keepalive=ASI_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=ASI_HTTP_KEEPALIVE_EXPIRY,
+            http2=ASI_HTTP2,
+            headers={
+                "Authorization": f"Bearer {ASI_API_KEY}",
+                "Content-Type": "application/json",
+            }, timeout=30,
+        )
+        self._client = self.pool.client
+        # Completions have no side effects, so both calls are retried
+        self.resilience = Resilience("asi", bulkheads={
+            "chat_completions": Bulkhead("asi chat_completions", ASI_MAX_IN_FLIGHT, ASI_MAX_QUEUE),
+        })
 
     async def classify_intent(self, user_text: str) -> str:
         payload = {
@@ -20,7 +37,7 @@ class ASIClient:
             ],
             "max_tokens": 2048
         }
-        r = await self._client.post("/chat/completions", json=payload)
+        r = await self.resilience.call("chat_completions", lambda: self._client.post("/chat/completions", json=payload))
         r.raise_for_status()
         data = r.json()
         return str(data["choices"][0]["message"]["content"])
@@ -46,7 +63,7 @@ class ASIClient:
             """},
             {"role":"user","content": f"Based on these verification results: {docs}\n\nPlease explain: {reason_payload}\n\nIMPORTANT: Only use information from the verification results above. Do not make up or assume any information."}
         ]
-        r = await self._client.post("/chat/completions", json={
+        r = await self.resilience.call("chat_completions", lambda: self._client.post("/chat/completions", json={
             "model":"asi1-mini", 
             "messages": messages, 
             "max_tokens": 2048,
@@ -54,7 +71,7 @@ class ASIClient:
             "top_p": 0.9,       # Focus on most likely tokens
             "frequency_penalty": 0.1,  # Reduce repetition
             "presence_penalty": 0.1    # Encourage focus on provided content
-        })
+        }))
         r.raise_for_status()
         data = r.json()
         return str(data["choices"][0]["message"]["content"])
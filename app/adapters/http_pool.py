@@ -0,0 +1,126 @@
+import asyncio
+import importlib.util
+import time
+from typing import Any, Dict
+
+import httpx
+
+from app.services.metrics import LatencyStats
+
+
+class _PoolTransport(httpx.AsyncHTTPTransport):
+    """AsyncHTTPTransport that times how long each request waits for a pooled connection."""
+
+    def __init__(self, pool: "HttpPool", **kwargs):
+        super().__init__(**kwargs)
+        self._owner = pool
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        owner = self._owner
+        started = time.perf_counter()
+        acquired = False
+        outer_trace = request.extensions.get("trace")
+
+        # httpcore reports connection events through the trace extension; the first
+        # one fires once the pool has handed the request a connection
+        async def trace(event: str, info: dict):
+            nonlocal acquired
+            if not acquired:
+                acquired = True
+                owner.wait.observe(time.perf_counter() - started)
+            if event == "connection.connect_tcp.complete":
+                owner.counters["connects"] += 1
+            elif event == "connection.start_tls.complete":
+                owner.counters["tls_handshakes"] += 1
+            if outer_trace is not None:
+                result = outer_trace(event, info)
+                if asyncio.iscoroutine(result):
+                    await result
+
+        request.extensions = {**request.extensions, "trace": trace}
+        owner.counters["requests"] += 1
+        try:
+            return await super().handle_async_request(request)
+        except Exception:
+            owner.counters["errors"] += 1
+            raise
+
+
+class HttpPool:
+    """
+    One upstream's httpx.AsyncClient with explicit pool limits and pool statistics.
+
+    The client is shared by everything talking to that upstream, so keep-alive
+    connections (and with HTTP/2, multiplexed streams) are reused across requests.
+    warm_up() opens connections ahead of the first real request.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        max_connections: int,
+        max_keepalive: int,
+        keepalive_expiry: float,
+        http2: bool = False,
+        **client_kwargs,
+    ):
+        if http2 and importlib.util.find_spec("h2") is None:
+            print(f"⚠️ HTTP/2 requested for {name} but the h2 package is not installed, using HTTP/1.1")
+            http2 = False
+        self.name = name
+        self.http2 = http2
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=min(max_keepalive, max_connections),
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.wait = LatencyStats()
+        self.counters = {"requests": 0, "errors": 0, "connects": 0, "tls_handshakes": 0, "warmed": 0}
+        self._transport = _PoolTransport(self, limits=self.limits, http2=http2)
+        self.client = httpx.AsyncClient(base_url=base_url, transport=self._transport, **client_kwargs)
+
+    async def warm_up(self, connections: int, timeout: float = 5.0):
+        """
+        Open up to connections keep-alive connections with concurrent HEAD requests to the base URL
+
+        Any HTTP status counts, only the connection matters; failures are logged, not raised.
+        """
+        connections = min(connections, self.limits.max_keepalive_connections or connections)
+        if connections <= 0:
+            return
+        # One HTTP/2 connection carries all streams
+        count = 1 if self.http2 else connections
+        results = await asyncio.gather(
+            *(self.client.head("", timeout=timeout) for _ in range(count)), return_exceptions=True
+        )
+        errors = [r for r in results if isinstance(r, Exception)]
+        self.counters["warmed"] += count - len(errors)
+        if errors:
+            print(f"⚠️ Warm-up of {self.name} pool: {len(errors)}/{count} failed ({errors[0].__class__.__name__})")
+
+    def stats(self) -> Dict[str, Any]:
+        in_use = idle = queued = 0
+        # httpcore's pool; not public on the transport, so read it defensively
+        pool = getattr(self._transport, "_pool", None)
+        try:
+            for connection in pool.connections:
+                if connection.is_idle():
+                    idle += 1
+                else:
+                    in_use += 1
+            queued = sum(1 for request in pool._requests if request.is_queued())
+        except AttributeError:
+            pass
+        return {
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "in_use": in_use,
+            "idle": idle,
+            "queued": queued,
+            **self.counters,
+            **{f"wait_{k}": v for k, v in self.wait.stats().items()},
+        }
+
+    async def aclose(self):
+        await self.client.aclose()
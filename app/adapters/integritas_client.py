@@ -2,22 +2,41 @@ import io
 import json
 import httpx
 from typing import Dict, Any, List
-from app.config.settings import INTEGRITAS_API_KEY, INTEGRITAS_BASE_URL
+from app.adapters.http_pool import HttpPool
+from app.adapters.resilience import Bulkhead, Resilience
+from app.config.settings import (
+    INTEGRITAS_API_KEY, INTEGRITAS_BASE_URL, INTEGRITAS_HTTP_MAX_CONNECTIONS, INTEGRITAS_HTTP_MAX_KEEPALIVE,
+    INTEGRITAS_HTTP_KEEPALIVE_EXPIRY, INTEGRITAS_HTTP2, STAMP_MAX_IN_FLIGHT, STAMP_MAX_QUEUE,
+    VERIFY_MAX_IN_FLIGHT, VERIFY_MAX_QUEUE,
+)
 
 class IntegritasClient:
     def __init__(self):
-        self._client = httpx.AsyncClient(
-            base_url=INTEGRITAS_BASE_URL,
+        self.pool = HttpPool(
+            "integritas",
+            INTEGRITAS_BASE_URL,
+            max_connections=INTEGRITAS_HTTP_MAX_CONNECTIONS,
+            max_keepalive=INTEGRITAS_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=INTEGRITAS_HTTP_KEEPALIVE_EXPIRY,
+            http2=INTEGRITAS_HTTP2,
             headers={"x-api-key": INTEGRITAS_API_KEY},
             timeout=600
         )
+        self._client = self.pool.client
+        # Every call goes through a per-endpoint circuit breaker; all but stamping are retried.
+        # Stamping and verification also have their own bulkhead, so a burst of one can't starve the other
+        self.resilience = Resilience("integritas", bulkheads={
+            "timestamp_post": Bulkhead("integritas timestamp_post", STAMP_MAX_IN_FLIGHT, STAMP_MAX_QUEUE),
+            "verify": Bulkhead("integritas verify", VERIFY_MAX_IN_FLIGHT, VERIFY_MAX_QUEUE),
+        })
 
     async def stamp_hash(self, hash_value: str, request_id: str) -> str | None:
-        r = await self._client.post(
+        # Not retried: a lost response could mean the hash was stamped twice
+        r = await self.resilience.call("timestamp_post", lambda: self._client.post(
             "/v1/timestamp/post",
             headers={"x-request-id": request_id, "Content-Type": "application/json"},
             json={"hash": hash_value}
-        )
+        ), idempotent=False)
         if r.status_code != 200:
             return None
         data = r.json()
@@ -26,24 +45,28 @@ class IntegritasClient:
         return None
 
     async def status_by_uids(self, uids: list[str]) -> Dict[str, Any] | None:
-        r = await self._client.post(
+        r = await self.resilience.call("timestamp_status", lambda: self._client.post(
             "/v1/timestamp/status",
             headers={"Content-Type": "application/json"},
             json={"uids": uids}
-        )
+        ))
         if r.status_code != 200:
             return None
         return r.json()
 
-    async def verify_proof(self, items: list[dict], request_id: str) -> Dict[str, Any] | None:
+    async def verify_proof(self, items: list[dict], request_id: str, report: bool = True) -> Dict[str, Any] | None:
         # Server expects a JSON file upload. Send in-memory file.
         bytes_data = json.dumps(items).encode("utf-8")
-        files = {"file": ("proof_data.json", io.BytesIO(bytes_data), "application/json")}
-        r = await self._client.post(
+        # Without a report the server skips PDF generation and returns the result only (no data.file)
+        headers = {"x-request-id": request_id, "x-report-required": "true" if report else "false"}
+        if report:
+            headers["x-return-format"] = "link"
+        # A fresh file object per attempt, the upload consumes it
+        r = await self.resilience.call("verify", lambda: self._client.post(
             "/v1/verify/post-lite-pdf",
-            headers={"x-request-id": request_id, "x-report-required": "true", "x-return-format": "link"},
-            files=files
-        )
+            headers=headers,
+            files={"file": ("proof_data.json", io.BytesIO(bytes_data), "application/json")}
+        ), retry_timeouts=False)  # a timed-out verify already took the full 600 s
         if r.status_code != 200:
             return None
         return r.json()
@@ -54,11 +77,11 @@ class IntegritasClient:
         if request_id:
             headers["x-request-id"] = request_id
             
-        r = await self._client.post(
+        r = await self.resilience.call("proof_file_link", lambda: self._client.post(
             "/v1/timestamp/get-proof-file-link",
             headers=headers,
             json={"uids": uids}
-        )
+        ))
         if r.status_code != 200:
             return None
         return r.json()
@@ -0,0 +1,322 @@
+import asyncio
+import contextlib
+import math
+import random
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional
+
+import httpx
+
+from app.config.settings import (
+    BULKHEAD_QUEUE_TIMEOUT_SECONDS, CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_RESET_SECONDS, RETRY_AFTER_MAX_SECONDS,
+    RETRY_ATTEMPTS, RETRY_BASE_DELAY_SECONDS, RETRY_BUDGET_SECONDS, RETRY_MAX_DELAY_SECONDS,
+)
+from app.services.metrics import LatencyStats
+
+# Responses that mean the upstream is overloaded or broken, not that the request was wrong
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+_STATE_CODES = {"closed": 0, "half_open": 1, "open": 2}
+
+
+class CircuitOpenError(RuntimeError):
+    """An upstream endpoint's circuit breaker is open; the call was not made."""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(f"{endpoint} is unavailable (circuit open), retry in {math.ceil(retry_in)}s")
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+class OverloadedError(RuntimeError):
+    """An endpoint's bulkhead had no free slot in time; the call was not made."""
+
+    def __init__(self, endpoint: str, reason: str):
+        super().__init__(f"{endpoint} is overloaded ({reason}), try again later")
+        self.endpoint = endpoint
+
+
+class Bulkhead:
+    """
+    Concurrency limit for one endpoint.
+
+    At most max_in_flight calls run at once. Up to max_queue more callers wait
+    for a slot, each for at most queue_timeout seconds; beyond that callers are
+    turned away at once. Either way they get OverloadedError, so a slow endpoint
+    cannot pile up work that starves the others.
+    """
+
+    def __init__(self, endpoint: str, max_in_flight: int, max_queue: int, queue_timeout: float = BULKHEAD_QUEUE_TIMEOUT_SECONDS):
+        self.endpoint = endpoint
+        self.max_in_flight = max(1, max_in_flight)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self.in_flight = 0
+        self.queued = 0
+        self.wait = LatencyStats()
+        self.counters = {"admitted": 0, "rejected_full": 0, "timed_out": 0, "max_queued": 0}
+
+    @contextlib.asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Hold one in-flight slot for the duration of the block
+
+        Raises:
+            OverloadedError: When the queue is full or no slot frees up within queue_timeout
+        """
+        if not self._semaphore.locked():
+            # A free slot is taken without suspending, so the check above stays accurate
+            await self._semaphore.acquire()
+            self.wait.observe(0.0)
+        else:
+            if self.queued >= self.max_queue:
+                self.counters["rejected_full"] += 1
+                raise OverloadedError(self.endpoint, f"{self.queued} calls already waiting")
+            started = time.perf_counter()
+            self.queued += 1
+            self.counters["max_queued"] = max(self.counters["max_queued"], self.queued)
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.counters["timed_out"] += 1
+                raise OverloadedError(self.endpoint, f"no free slot within {self.queue_timeout:g}s") from None
+            finally:
+                self.queued -= 1
+                self.wait.observe(time.perf_counter() - started)
+        self.counters["admitted"] += 1
+        self.in_flight += 1
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "queued": self.queued,
+            "max_queue": self.max_queue,
+            **self.counters,
+            **{f"wait_{k}": v for k, v in self.wait.stats().items()},
+        }
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker for one endpoint.
+
+    closed: calls go through. After failure_threshold consecutive failures the
+    breaker opens and calls fail fast for reset_timeout seconds. Then it is
+    half_open: one trial call goes through; success closes it, failure opens it again.
+    """
+
+    def __init__(self, endpoint: str, failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_timeout: float = CIRCUIT_RESET_SECONDS):
+        self.endpoint = endpoint
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self.counters = {"calls": 0, "failures": 0, "rejected": 0, "opened": 0}
+
+    def before_call(self):
+        """
+        Admit a call or fail fast
+
+        Raises:
+            CircuitOpenError: While open, or half_open with the trial call still running
+        """
+        if self.state == "open":
+            remaining = self.opened_at + self.reset_timeout - time.monotonic()
+            if remaining > 0:
+                self.counters["rejected"] += 1
+                raise CircuitOpenError(self.endpoint, remaining)
+            self.state = "half_open"
+        if self.state == "half_open":
+            if self._trial_in_flight:
+                self.counters["rejected"] += 1
+                raise CircuitOpenError(self.endpoint, 0)
+            self._trial_in_flight = True
+        self.counters["calls"] += 1
+
+    def record_success(self):
+        self._trial_in_flight = False
+        self.consecutive_failures = 0
+        self.state = "closed"
+
+    def abandon(self):
+        """A call ended without an outcome (e.g. cancelled); let the next trial through."""
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self._trial_in_flight = False
+        self.consecutive_failures += 1
+        self.counters["failures"] += 1
+        if self.state == "half_open" or self.consecutive_failures >= self.failure_threshold:
+            if self.state != "open":
+                self.counters["opened"] += 1
+                print(f"⚠️ Circuit for {self.endpoint} opened after {self.consecutive_failures} consecutive failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "state_code": _STATE_CODES[self.state],  # 0 closed, 1 half open, 2 open
+            "consecutive_failures": self.consecutive_failures,
+            **self.counters,
+        }
+
+
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    """Seconds asked for by a Retry-After header (delta-seconds or HTTP date), if any."""
+    value = response.headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class Resilience:
+    """
+    Retries, circuit breakers and bulkheads for the calls of one upstream, one breaker per endpoint.
+
+    Idempotent calls are retried on transport errors and RETRY_STATUSES with
+    exponential backoff and full jitter; a Retry-After on 429/503 replaces the
+    backoff delay, unless it is longer than retry_after_max, in which case the
+    response is returned as is. No retry starts once retry_budget seconds have
+    passed since the first attempt (or would pass during the backoff), so a slow
+    upstream is not waited on several times over. Other calls only go through
+    the breaker. A PoolTimeout (no free local connection) is raised as is and
+    does not count against the breaker. Endpoints with a bulkhead hold one of
+    its slots for each attempt (not while backing off).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        attempts: int = RETRY_ATTEMPTS,
+        base_delay: float = RETRY_BASE_DELAY_SECONDS,
+        max_delay: float = RETRY_MAX_DELAY_SECONDS,
+        retry_after_max: float = RETRY_AFTER_MAX_SECONDS,
+        retry_budget: float = RETRY_BUDGET_SECONDS,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = CIRCUIT_RESET_SECONDS,
+        bulkheads: Optional[Dict[str, Bulkhead]] = None,
+    ):
+        self.name = name
+        self.bulkheads = bulkheads or {}
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retry_after_max = retry_after_max
+        self.retry_budget = retry_budget
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.retries = 0
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        breaker = self.breakers.get(endpoint)
+        if breaker is None:
+            breaker = self.breakers[endpoint] = CircuitBreaker(f"{self.name} {endpoint}", self.failure_threshold, self.reset_timeout)
+        return breaker
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter delay before retry number attempt (1 = first retry)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** (attempt - 1))))
+
+    async def call(
+        self,
+        endpoint: str,
+        send: Callable[[], Awaitable[httpx.Response]],
+        idempotent: bool = True,
+        retry_timeouts: bool = True,
+    ) -> httpx.Response:
+        """
+        Make a request through endpoint's breaker, retrying if idempotent
+
+        Args:
+            endpoint: Breaker and metrics name, e.g. "timestamp_status"
+            send: Makes the request; called again for every attempt
+            retry_timeouts: Also retry after a timeout; off for slow endpoints where
+                a timeout already took the caller's whole patience
+
+        Returns:
+            The last response, which may still be an error status
+
+        Raises:
+            CircuitOpenError: When the breaker is open
+            OverloadedError: When the endpoint's bulkhead turns the call away
+            httpx.TransportError: The last transport error once retries are exhausted
+        """
+        breaker = self.breaker(endpoint)
+        bulkhead = self.bulkheads.get(endpoint)
+        attempts = self.attempts if idempotent else 1
+        started = time.monotonic()
+        for attempt in range(1, attempts + 1):
+            breaker.before_call()
+            try:
+                async with bulkhead.slot() if bulkhead else contextlib.nullcontext():
+                    response = await send()
+            except httpx.PoolTimeout:
+                # Waited for a local pool connection; says nothing about the upstream
+                breaker.abandon()
+                raise
+            except httpx.TransportError as e:
+                breaker.record_failure()
+                delay = self.backoff(attempt)
+                if (
+                    attempt == attempts
+                    or (isinstance(e, httpx.TimeoutException) and not retry_timeouts)
+                    or not self._within_budget(started, delay)
+                ):
+                    raise
+                await self._sleep(delay)
+                continue
+            except BaseException:
+                breaker.abandon()
+                raise
+
+            if response.status_code not in RETRY_STATUSES:
+                breaker.record_success()
+                return response
+
+            breaker.record_failure()
+            if attempt == attempts:
+                return response
+            delay = self.backoff(attempt)
+            if response.status_code in (429, 503):
+                retry_after = retry_after_seconds(response)
+                if retry_after is not None:
+                    if retry_after > self.retry_after_max:
+                        return response
+                    delay = retry_after
+            if not self._within_budget(started, delay):
+                return response
+            await self._sleep(delay)
+        return response
+
+    def _within_budget(self, started: float, delay: float) -> bool:
+        return time.monotonic() - started + delay <= self.retry_budget
+
+    async def _sleep(self, delay: float):
+        self.retries += 1
+        await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {"retries": self.retries}
+        for endpoint, breaker in self.breakers.items():
+            stats.update({f"{endpoint}_{k}": v for k, v in breaker.stats().items()})
+        for endpoint, bulkhead in self.bulkheads.items():
+            stats.update({f"{endpoint}_bulkhead_{k}": v for k, v in bulkhead.stats().items()})
+        return stats
@@ -0,0 +1,116 @@
+import asyncio
+import json
+import time
+from datetime import datetime
+from secrets import token_bytes
+from typing import Any, Dict, List
+
+import httpx
+from uagents_core.identity import Identity
+from uagents_core.storage import compute_attestation
+
+from app.adapters.http_pool import HttpPool
+from app.config.settings import (
+    DOWNLOAD_MAX_CONCURRENCY, DOWNLOAD_TIMEOUT_SECONDS, STORAGE_URL, STORAGE_HTTP_MAX_CONNECTIONS,
+    STORAGE_HTTP_MAX_KEEPALIVE, STORAGE_HTTP_KEEPALIVE_EXPIRY, STORAGE_HTTP2,
+)
+from app.services.metrics import LatencyStats
+
+# Response bodies above this size are parsed off the event loop
+_PARSE_IN_THREAD_BYTES = 1 << 20
+# Same validity ExternalStorage gives its attestations
+_ATTESTATION_VALIDITY_SECONDS = 3600
+
+
+class StorageClient:
+    """
+    Async downloads of chat attachments from Agentverse storage.
+
+    Same endpoint and auth as ExternalStorage.download, which is a blocking
+    requests.get, but on one shared httpx client, with at most max_concurrency
+    downloads in flight and an end-to-end timeout per download.
+    """
+
+    def __init__(
+        self,
+        storage_url: str = STORAGE_URL,
+        max_concurrency: int = DOWNLOAD_MAX_CONCURRENCY,
+        timeout: float = DOWNLOAD_TIMEOUT_SECONDS,
+    ):
+        self.storage_url = storage_url
+        self.timeout = timeout
+        self.pool = HttpPool(
+            "storage", storage_url,
+            max_connections=STORAGE_HTTP_MAX_CONNECTIONS,
+            max_keepalive=STORAGE_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=STORAGE_HTTP_KEEPALIVE_EXPIRY,
+            http2=STORAGE_HTTP2,
+            timeout=timeout,
+        )
+        self._client = self.pool.client
+        self._max_concurrency = max(1, max_concurrency)
+        self._semaphore: asyncio.Semaphore | None = None
+        self.latency = LatencyStats()
+        self.counters = {"failures": 0, "timeouts": 0, "bytes": 0}
+
+    @staticmethod
+    def _auth_header(identity: Identity) -> dict:
+        # The header ExternalStorage sends, built from the public attestation helper
+        attestation = compute_attestation(
+            identity=identity,
+            validity_start=datetime.now(),
+            validity_secs=_ATTESTATION_VALIDITY_SECONDS,
+            nonce=token_bytes(32),
+        )
+        return {"Authorization": f"Agent {attestation}"}
+
+    async def download(self, asset_id: str, identity: Identity) -> Dict[str, Any]:
+        """
+        Download one asset
+
+        Returns:
+            The storage response: {"contents", "mime_type", "filename", ...}
+
+        Raises:
+            RuntimeError: On a non-200 response
+            asyncio.TimeoutError: When the download takes longer than timeout
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        async with self._semaphore:
+            started = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(
+                    self._client.get(f"/assets/{asset_id}/contents/", headers=self._auth_header(identity)),
+                    self.timeout,
+                )
+                if response.status_code != 200:
+                    raise RuntimeError(f"Download failed: {response.status_code}, {response.text}")
+                body = response.content
+                self.counters["bytes"] += len(body)
+                if len(body) > _PARSE_IN_THREAD_BYTES:
+                    return await asyncio.to_thread(json.loads, body)
+                return json.loads(body)
+            except asyncio.TimeoutError:
+                self.counters["timeouts"] += 1
+                raise
+            except Exception:
+                self.counters["failures"] += 1
+                raise
+            finally:
+                self.latency.observe(time.perf_counter() - started)
+
+    async def download_many(self, asset_ids: List[str], identity: Identity) -> List[Any]:
+        """
+        Download several assets concurrently (bounded by max_concurrency)
+
+        Returns:
+            One entry per asset id, in order: the storage response or the raised exception
+        """
+        return await asyncio.gather(*(self.download(a, identity) for a in asset_ids), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.latency.stats(), **self.counters}
+
+    async def aclose(self):
+        await self._client.aclose()
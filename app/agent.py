@@ -1,32 +1,53 @@
 # from fileinput import filename
 # import os
+import asyncio
+import itertools
 import httpx
 import traceback
 import json
+import time
 from uuid import uuid4
 from datetime import datetime, timezone
+from typing import Any, Dict
 # from sortedcontainers.sortedlist import identity
 from uagents import Agent, Context, Protocol, Model
 from uagents_core.contrib.protocols.chat import (
     ChatAcknowledgement, ChatMessage, MetadataContent, ResourceContent,StartSessionContent, EndSessionContent, TextContent, chat_protocol_spec
 )
-from uagents_core.storage import ExternalStorage
 
 from app.protocols.integritas_proto import (
     IntegritasProtocol,
     StampHashRequest, StampHashResponse, UidRequest, UidResponse,
-    VerifyProofRequest, VerifyProofResponse, Error
+    SubscribeUidRequest, SubscribeUidResponse,
+    StampHashBatchRequest, StampHashBatchResponse, StampHashItem,
+    UidBatchRequest, UidBatchResponse, UidItem,
+    VerifyProofRequest, VerifyProofResponse, VerifyProofOptionsRequest,
+    VerifyReportRequest, VerifyReportResponse, Error
 )
 
-from app.config.settings import AGENT_SEED, AGENT_PORT, AGENT_ENDPOINT, STORAGE_URL
+from app.config.settings import AGENT_SEED, AGENT_PORT, AGENT_ENDPOINT, BATCH_MAX_ITEMS, UID_REQUEST_MODE, VERIFY_REPORT_CHANNELS
+from app.config.settings import HTTP_WARMUP_CONNECTIONS
 from app.adapters.asi_client import ASIClient
 from app.adapters.integritas_client import IntegritasClient
+from app.adapters.resilience import CircuitOpenError, OverloadedError
+from app.adapters.storage_client import StorageClient
 # from app.services import hashing_service
 from app.services.intent_service import IntentService
 from app.services.stamping_service import StampingService
+from app.services.status_poller import StatusPoller
+from app.services.poll_schedule import build_poll_schedule
+from app.services.stamp_journal import StampJournal
+from app.services.proof_cache import ProofCache
+from app.services.verification_cache import VerificationCache, report_file
+from app.services.explanation_service import ExplanationService
+from app.services import metrics
 from app.services.hashing_service import HashingService
 from app.services.verification_service import VerificationService
-from app.formatters.chat_presenters import final_hash_confirmation, verification_report
+from app.services.mmr_proof import ProofRejected
+from app.services.proof_file import ProofFileError
+from app.formatters.chat_presenters import (
+    batch_hash_confirmation, batch_verification_report, changed_ranges_notice, final_hash_confirmation, verification_report,
+)
 from app.integritas_docs import docs  # keep your docs string here or move under /config
 
 # --- Agent + Protocols
@@ -45,9 +66,32 @@ protocol = Protocol(spec=chat_protocol_spec)
 asi = ASIClient()
 integ = IntegritasClient()
 intent_service = IntentService(asi)
-stamping_service = StampingService(integ)
-verification_service = VerificationService(integ)
+proof_cache = ProofCache()
+status_poller = StatusPoller(integ, build_poll_schedule(), cache=proof_cache)  # POLL_* settings, shared by chat and RPC
+stamp_journal = StampJournal()
+stamping_service = StampingService(integ, status_poller, stamp_journal)
+verification_cache = VerificationCache()
+verification_service = VerificationService(integ, verification_cache)
 hashing_service = HashingService()
+explanation_service = ExplanationService(asi, docs)
+storage_client = StorageClient()
+chat_latency = metrics.LatencyStats()  # whole chat handling, downloads included
+
+metrics.register("status_poller", status_poller.stats)
+metrics.register("stamping", stamping_service.stats)
+metrics.register("proof_cache", proof_cache.stats)
+metrics.register("verification_cache", verification_cache.stats)
+metrics.register("verification", verification_service.stats)
+metrics.register("explanations", explanation_service.stats)
+metrics.register("intent", intent_service.stats)
+metrics.register("hashing", hashing_service.stats)
+metrics.register("downloads", storage_client.stats)
+metrics.register("chat", chat_latency.stats)
+metrics.register("http_integritas", integ.pool.stats)
+metrics.register("http_asi", asi.pool.stats)
+metrics.register("http_storage", storage_client.pool.stats)
+metrics.register("resilience_integritas", integ.resilience.stats)
+metrics.register("resilience_asi", asi.resilience.stats)
 
 # This is used to add metadata to the chat message for the agentverse storage
 def create_metadata(metadata: dict[str, str]) -> ChatMessage:
@@ -78,41 +122,28 @@ async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
     if not text:
         return
 
+    started = time.perf_counter()
     try:
-        # First, detect uploaded files
+        # First, download uploaded files from the agentverse storage, concurrently
         uploaded_files = []
-        for item in msg.content:
-            # Check if content is a file resource
-            if isinstance(item, ResourceContent):
-                try:
-                    external_storage = ExternalStorage(
-                        identity=ctx.agent.identity,
-                        storage_url=STORAGE_URL,
-                    )
-                    data = external_storage.download(str(item.resource_id)) # Download the file from the agentverse storage
-                    # print(f"data: {data}")
-                    # Collect metadata for the file
-                    uploaded_files.append({
-                        "type": "resource", 
-                        "mime_type": data["mime_type"], # file type
-                        "contents": data["contents"], # file contents (bytes or string)
-                        "filename": data.get("filename", "uploaded_file"),  # Extract filename
-                    })
-                    # print(f"uploaded_files: {uploaded_files}")
-                    ctx.logger.info(f"Downloaded file: {data.get('filename', 'uploaded_file')}")
-
-                except Exception as e:
-                    ctx.logger.error(f"Failed to download file: {e}")
-                    await _reply(ctx, sender, "Failed to download uploaded file.")
-                    return
-
-        # Enhance the text with file information for better intent detection
-        enhanced_text = text
-        if uploaded_files:
-            filename = uploaded_files[0]["filename"]
-            enhanced_text = f"{text} [File uploaded: {filename}]"
-
-        intent = await intent_service.detect(enhanced_text)
+        resource_ids = [str(item.resource_id) for item in msg.content if isinstance(item, ResourceContent)]
+        downloads = await storage_client.download_many(resource_ids, ctx.agent.identity) if resource_ids else []
+        for data in downloads:
+            if isinstance(data, BaseException):
+                ctx.logger.error(f"Failed to download file: {data!r}")
+                await _reply(ctx, sender, "Failed to download uploaded file.")
+                return
+            # Collect metadata for the file
+            uploaded_files.append({
+                "type": "resource", 
+                "mime_type": data["mime_type"], # file type
+                "contents": data["contents"], # file contents (bytes or string)
+                "filename": data.get("filename", "uploaded_file"),  # Extract filename
+            })
+            ctx.logger.info(f"Downloaded file: {data.get('filename', 'uploaded_file')}")
+
+        # Obvious requests are classified by rules, the rest by the LLM
+        intent = await intent_service.detect(text, uploaded_files)
         ctx.logger.info(f"Intent: {intent.kind}, payload: {intent.payload}")
         print(f"Intent: {intent.kind}, payload: {intent.payload}")
         
@@ -147,14 +178,32 @@ async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
         #         await _reply(ctx, sender, f"✅ File hashed successfully!\n\n**Filename:** {hash_record['filename']}\n**Hash:** {hash_record['hash']}\n\nWould you like me to stamp this hash on the blockchain?")
         #     return
         
+        if intent.kind == "STAMP_FILE" and len(uploaded_files) > 1:
+            # Hash every attachment concurrently, stamp them as a batch and confirm them together
+            hash_records = await asyncio.gather(*(hashing_service.hash_uploaded_file_async(f) for f in uploaded_files))
+            for hash_record, file_data in zip(hash_records, uploaded_files):
+                changes = await _store_hash_record(ctx, sender, hash_record, file_data)
+                if changes:
+                    await _reply(ctx, sender, changed_ranges_notice(hash_record["filename"], changes))
+
+            async def status_callback(message):
+                await _reply(ctx, sender, message)
+
+            results = await stamping_service.stamp_hashes([r["hash"] for r in hash_records], sender, status_callback=status_callback)
+            files = [{"filename": r["filename"], "hash": r["hash"], "result": result} for r, result in zip(hash_records, results)]
+            await _reply(ctx, sender, batch_hash_confirmation(files), end_session=True)
+            return
+
         if intent.kind == "STAMP_FILE":
             if uploaded_files:
                 # First hash the uploaded file
                 file_data = uploaded_files[0]
-                hash_record = hashing_service.hash_uploaded_file(file_data)
+                hash_record = await hashing_service.hash_uploaded_file_async(file_data)
                 
                 # Store the hash result in storage
-                ctx.storage.set(f"hash_{hash_record['file_id']}", hash_record)
+                changes = await _store_hash_record(ctx, sender, hash_record, file_data)
+                if changes:
+                    await _reply(ctx, sender, changed_ranges_notice(hash_record["filename"], changes))
                 
                 # Now stamp the hash using the reusable service method
                 hash_value = hash_record['hash']
@@ -188,15 +237,20 @@ async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
                 return
 
             request_id = f"asi-agent-{sender[:8]}-{int(datetime.now(timezone.utc).timestamp())}"
-            verification = await verification_service.verify(
-                proof=pd["proof"], root=pd["root"], address=pd["address"], data=pd["data"], request_id=request_id
-            )
+            try:
+                verification = await verification_service.verify(
+                    proof=pd["proof"], root=pd["root"], address=pd["address"], data=pd["data"], request_id=request_id,
+                    report="chat" in VERIFY_REPORT_CHANNELS
+                )
+            except ProofRejected as e:
+                await _reply(ctx, sender, f"❌ This proof cannot be valid: {e}. Please check your data and try again.")
+                return
             if not verification:
                 await _reply(ctx, sender, "❌ Failed to verify proof. Please check your data and try again.")
                 return
 
             # Ask ASI to produce a human explanation
-            reason = await asi.explain_verification(docs, json.dumps(verification))
+            reason = await explanation_service.explain(verification)
             await _reply(ctx, sender, verification_report(verification, reason), end_session=True)
             return
 
@@ -208,34 +262,31 @@ async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
                 await _reply(ctx, sender, "❌ No file uploaded. Please upload a proof file to verify.")
                 return
             
-            # Check if the uploaded file is a valid proof file
-            file_data = uploaded_files[0]
-            # print(f"Step 3: File data keys: {list(file_data.keys())}")
-            # print(f"Step 3: File mime_type: {file_data.get('mime_type')}")
-            # print(f"Step 3: File filename: {file_data.get('filename')}")
+            # Every attached JSON file is read as a proof file, entries from all of them together.
+            # Each file is decoded and parsed once, validation happening as its entries stream in.
+            proof_files = [f for f in uploaded_files if f.get("mime_type") == "application/json"] or uploaded_files[:1]
+            entries = itertools.chain.from_iterable(verification_service.iter_proof_entries(f) for f in proof_files)
             
-            if not verification_service.is_proof_file(file_data):
-                await _reply(ctx, sender, "❌ The uploaded file is not a valid proof file. Please ensure it's a JSON file with the required structure containing address, data, proof, and root properties.")
-                return
-            
-            # print(f"Step 3: Proof file validation successful, proceeding to verification")
-            
-            # Parse the proof file to extract verification data
             try:
-                first_proof = verification_service.parse_proof_file(file_data)
-                
-                # print(f"Step 3: Extracted proof data: {first_proof}")
-                
-                # Use the same verification logic as VERIFY_PROOF
-                # print(f"Step 4: Using same verification logic as existing verify function")
+                head = list(itertools.islice(entries, 2))
                 request_id = f"asi-agent-{sender[:8]}-{int(datetime.now(timezone.utc).timestamp())}"
-                # print(f"first_proof: {first_proof['proof']}")
+
+                if len(head) > 1:
+                    report = await verification_service.verify_many(
+                        itertools.chain(head, entries), request_id, report="chat" in VERIFY_REPORT_CHANNELS
+                    )
+                    await _reply(ctx, sender, batch_verification_report(report), end_session=True)
+                    return
+
+                # A single proof: same verification logic and report as VERIFY_PROOF
+                first_proof = head[0]
                 verification = await verification_service.verify(
                     proof=first_proof["proof"], 
                     root=first_proof["root"], 
                     address=first_proof["address"], 
                     data=first_proof["data"], 
-                    request_id=request_id
+                    request_id=request_id,
+                    report="chat" in VERIFY_REPORT_CHANNELS
                 )
                 
                 if not verification:
@@ -243,11 +294,16 @@ async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
                     return
 
                 # Ask ASI to produce a human explanation (same as VERIFY_PROOF)
-                # print(f"Step 4: Using same response format as existing verify function")
-                reason = await asi.explain_verification(docs, json.dumps(verification))
+                reason = await explanation_service.explain(verification)
                 await _reply(ctx, sender, verification_report(verification, reason), end_session=True)
                 return
                 
+            except ProofFileError as e:
+                await _reply(ctx, sender, f"❌ The uploaded file is not a valid proof file ({e}). Please ensure it's a JSON file with the required structure containing address, data, proof, and root properties.")
+                return
+            except ProofRejected as e:
+                await _reply(ctx, sender, f"❌ The proof in this file cannot be valid: {e}.")
+                return
             except Exception as e:
                 print(f"❌ Error processing proof file: {e}")
                 await _reply(ctx, sender, f"❌ Error processing proof file: {str(e)}")
@@ -256,9 +312,14 @@ async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
         # GENERAL: forward ASI content as-is (no links mandated by your system prompt)
         await _reply(ctx, sender, intent.raw_response)
 
+    except (CircuitOpenError, OverloadedError) as e:
+        ctx.logger.warning(str(e))
+        await _reply(ctx, sender, f"⚠️ The service is temporarily unavailable ({e}). Please try again shortly.")
     except Exception as e:
         ctx.logger.exception("Handler error")
         await _reply(ctx, sender, "I’m sorry—something went wrong while processing your request.")
+    finally:
+        chat_latency.observe(time.perf_counter() - started)
 
 # async def _reply(ctx: Context, to: str, text: str, end_session: bool = False):
 #     contents = [TextContent(type="text", text=text)]
@@ -268,6 +329,35 @@ async def handle_message(ctx: Context, sender: str, msg: ChatMessage):
 #         content=contents
 #     ))
 
+async def _store_hash_record(ctx: Context, sender: str, hash_record: dict, file_data: dict) -> list[dict] | None:
+    """
+    Store a hash record; in merkle mode also its manifest, once, under merkle_<root>.
+
+    Returns:
+        Byte ranges that changed since the sender last stamped a file of the same name
+        in merkle mode, or None when there is nothing to compare
+    """
+    manifest = hash_record.pop("manifest", None)
+    ctx.storage.set(f"hash_{hash_record['file_id']}", hash_record)
+    if manifest is None:
+        return None
+
+    # Leaf hashes, keyed by the stamped root, to locate changed chunks when the file comes back
+    root = hash_record["hash"]
+    ctx.storage.set(f"merkle_{root}", manifest)
+    latest_key = f"merkle_latest_{sender}_{hash_record['filename']}"
+    previous_root = ctx.storage.get(latest_key)
+    ctx.storage.set(latest_key, root)
+    previous = ctx.storage.get(f"merkle_{previous_root}") if previous_root and previous_root != root else None
+    if not previous:
+        return None
+    try:
+        # Only re-hashes the upload when the stored manifest used another leaf size
+        return await asyncio.to_thread(hashing_service.diff_upload, previous, file_data, manifest)
+    except Exception as e:
+        print(f"❌ Could not compare {hash_record['filename']} with its previous stamp: {e}")
+        return None
+
 async def _reply(ctx: Context, to: str, text: str, end_session: bool = False):
     contents = [TextContent(type="text", text=text)]
     if end_session:
@@ -282,6 +372,12 @@ async def _reply(ctx: Context, to: str, text: str, end_session: bool = False):
     )
 
 # 2) Structured protocol (agent↔agent RPC)
+def _upstream_error(e: Exception) -> Error:
+    """Protocol Error for an exception: a full bulkhead is reported as TIMEOUT so callers back off and retry."""
+    if isinstance(e, OverloadedError):
+        return Error(code="TIMEOUT", message=str(e))
+    return Error(code="INTERNAL", message=str(e))
+
 @IntegritasProtocol.on_message(StampHashRequest)
 async def rpc_stamp(ctx: Context, sender: str, msg: StampHashRequest):
     ctx.logger.info("Stamp requested")
@@ -308,7 +404,7 @@ async def rpc_stamp(ctx: Context, sender: str, msg: StampHashRequest):
         ctx.logger.exception("rpc_stamp error")
         await ctx.send(sender, StampHashResponse(
             request_id=msg.request_id, ok=False,
-            error=Error(code="INTERNAL", message=str(e))
+            error=_upstream_error(e)
         ))
 
 @IntegritasProtocol.on_message(UidRequest)
@@ -322,27 +418,167 @@ async def rpc_status(ctx: Context, sender: str, msg: UidRequest):
             ))
             return
 
-        proof = await stamping_service.wait_for_onchain(msg.uid)
-        if not proof:
-            await ctx.send(sender, UidResponse(
+        if UID_REQUEST_MODE == "immediate":
+            proof = await stamping_service.current_status(msg.uid)
+            await _send_uid_response(ctx, sender, msg.request_id, proof)
+            return
+
+        # Reply once the uid is on-chain; the handler itself returns right away
+        _respond_when_onchain(ctx, sender, msg.request_id, msg.uid, "rpc")
+    except Exception as e:
+        ctx.logger.exception("rpc_status error")
+        await ctx.send(sender, UidResponse(
+            request_id=msg.request_id, ok=False,
+            error=_upstream_error(e)
+        ))
+
+@IntegritasProtocol.on_message(SubscribeUidRequest)
+async def rpc_subscribe(ctx: Context, sender: str, msg: SubscribeUidRequest):
+    ctx.logger.info("Uid subscription requested")
+    try:
+        if not msg.uid or len(msg.uid) < 20:
+            await ctx.send(sender, SubscribeUidResponse(
                 request_id=msg.request_id, ok=False,
-                error=Error(code="INTERNAL", message="Status check failed")
+                error=Error(code="BAD_REQUEST", message="Invalid uid")
             ))
             return
 
-        await ctx.send(sender, UidResponse(
-            request_id=msg.request_id, ok=True, proof=proof["proof"], root=proof["root"], address=proof["address"], data=proof["data"] 
+        _respond_when_onchain(ctx, sender, msg.request_id, msg.uid, "subscribe")
+        await ctx.send(sender, SubscribeUidResponse(request_id=msg.request_id, ok=True))
+    except Exception as e:
+        ctx.logger.exception("rpc_subscribe error")
+        await ctx.send(sender, SubscribeUidResponse(
+            request_id=msg.request_id, ok=False,
+            error=_upstream_error(e)
+        ))
+
+def _respond_when_onchain(ctx: Context, to: str, request_id: str, uid: str, channel: str):
+    """Journal the request and push a UidResponse when the poller resolves the uid."""
+    stamp_journal.record(uid, to, request_id, channel)
+
+    async def deliver(proof: dict):
+        await _send_uid_response(ctx, to, request_id, proof, timeout_error=(channel == "subscribe"))
+        stamp_journal.complete(uid, to, request_id)
+
+    stamping_service.subscribe(uid, deliver)
+
+async def _send_uid_response(ctx: Context, to: str, request_id: str, proof: dict | None, timeout_error: bool = False):
+    if not proof or proof.get("failed"):
+        await ctx.send(to, UidResponse(
+            request_id=request_id, ok=False,
+            error=Error(code="INTERNAL", message="Status check failed")
+        ))
+        return
+
+    if timeout_error and not proof["onchain"]:
+        await ctx.send(to, UidResponse(
+            request_id=request_id, ok=False,
+            error=Error(code="TIMEOUT", message="Not on-chain before the polling deadline")
+        ))
+        return
+
+    await ctx.send(to, UidResponse(
+        request_id=request_id, ok=True, proof=proof["proof"], root=proof["root"], address=proof["address"], data=proof["data"] 
+    ))
+
+@IntegritasProtocol.on_message(StampHashBatchRequest)
+async def rpc_stamp_batch(ctx: Context, sender: str, msg: StampHashBatchRequest):
+    ctx.logger.info(f"Batch stamp requested ({len(msg.hashes)} hashes)")
+    try:
+        if not msg.hashes or len(msg.hashes) > BATCH_MAX_ITEMS:
+            await ctx.send(sender, StampHashBatchResponse(
+                request_id=msg.request_id, ok=False,
+                error=Error(code="BAD_REQUEST", message=f"Batch must contain 1-{BATCH_MAX_ITEMS} hashes")
+            ))
+            return
+
+        results: list[StampHashItem | None] = [None] * len(msg.hashes)
+        valid = []
+        for i, hash_value in enumerate(msg.hashes):
+            if not hash_value or len(hash_value) < 32:
+                results[i] = StampHashItem(hash=hash_value, ok=False, error=Error(code="BAD_REQUEST", message="Invalid hash"))
+            else:
+                valid.append(i)
+
+        uids = await stamping_service.stamp_many([msg.hashes[i] for i in valid], request_id=f"rpc-{msg.request_id}")
+        for i, uid in zip(valid, uids):
+            if isinstance(uid, Exception):
+                results[i] = StampHashItem(hash=msg.hashes[i], ok=False, error=_upstream_error(uid))
+            elif not uid:
+                results[i] = StampHashItem(hash=msg.hashes[i], ok=False, error=Error(code="INTERNAL", message="Stamping failed"))
+            else:
+                results[i] = StampHashItem(hash=msg.hashes[i], ok=True, uid=uid)
+
+        await ctx.send(sender, StampHashBatchResponse(
+            request_id=msg.request_id, ok=any(r.ok for r in results), results=results
         ))
     except Exception as e:
-        ctx.logger.exception("rpc_status error")
-        await ctx.send(sender, UidResponse(
+        ctx.logger.exception("rpc_stamp_batch error")
+        await ctx.send(sender, StampHashBatchResponse(
             request_id=msg.request_id, ok=False,
-            error=Error(code="INTERNAL", message=str(e))
+            error=_upstream_error(e)
+        ))
+
+@IntegritasProtocol.on_message(UidBatchRequest)
+async def rpc_status_batch(ctx: Context, sender: str, msg: UidBatchRequest):
+    ctx.logger.info(f"Batch uid status requested ({len(msg.uids)} uids)")
+    try:
+        if not msg.uids or len(msg.uids) > BATCH_MAX_ITEMS:
+            await ctx.send(sender, UidBatchResponse(
+                request_id=msg.request_id, ok=False,
+                error=Error(code="BAD_REQUEST", message=f"Batch must contain 1-{BATCH_MAX_ITEMS} uids")
+            ))
+            return
+
+        results: list[UidItem | None] = [None] * len(msg.uids)
+        valid = []
+        for i, uid in enumerate(msg.uids):
+            if not uid or len(uid) < 20:
+                results[i] = UidItem(uid=uid, ok=False, error=Error(code="BAD_REQUEST", message="Invalid uid"))
+            else:
+                valid.append(i)
+
+        # Current status only, checked once in shared multi-uid status calls; SubscribeUidRequest waits for confirmation
+        proofs = await stamping_service.current_status_many([msg.uids[i] for i in valid])
+        for i, proof in zip(valid, proofs):
+            if proof.get("failed"):
+                results[i] = UidItem(uid=msg.uids[i], ok=False, error=Error(code="INTERNAL", message="Status check failed"))
+            elif not proof["onchain"]:
+                results[i] = UidItem(uid=msg.uids[i], ok=False, error=Error(code="TIMEOUT", message="Not on-chain yet"))
+            else:
+                results[i] = UidItem(
+                    uid=msg.uids[i], ok=True,
+                    proof=proof["proof"], root=proof["root"], address=proof["address"], data=proof["data"]
+                )
+
+        await ctx.send(sender, UidBatchResponse(
+            request_id=msg.request_id, ok=all(r.ok for r in results), results=results
+        ))
+    except Exception as e:
+        ctx.logger.exception("rpc_status_batch error")
+        await ctx.send(sender, UidBatchResponse(
+            request_id=msg.request_id, ok=False,
+            error=_upstream_error(e)
         ))
 
 @IntegritasProtocol.on_message(VerifyProofRequest)
 async def rpc_verify(ctx: Context, sender: str, msg: VerifyProofRequest):
     ctx.logger.info("Verify Proof Requested")
+    await _rpc_verify(ctx, sender, msg, with_report="rpc" in VERIFY_REPORT_CHANNELS)
+
+@IntegritasProtocol.on_message(VerifyProofOptionsRequest)
+async def rpc_verify_options(ctx: Context, sender: str, msg: VerifyProofOptionsRequest):
+    ctx.logger.info(f"Verify Proof Requested (report={msg.report})")
+    report = msg.report if msg.report is not None else "rpc" in VERIFY_REPORT_CHANNELS
+    await _rpc_verify(ctx, sender, msg, with_report=report)
+
+@IntegritasProtocol.on_message(VerifyReportRequest)
+async def rpc_verify_report(ctx: Context, sender: str, msg: VerifyReportRequest):
+    ctx.logger.info("Verification Report Requested")
+    await _rpc_verify(ctx, sender, msg, with_report=True, response=VerifyReportResponse)
+
+async def _rpc_verify(ctx: Context, sender: str, msg: VerifyProofRequest, with_report: bool, response=VerifyProofResponse):
+    """Verify msg's proof and answer with response (VerifyProofResponse or VerifyReportResponse)."""
     # try:
     #     for key in ("proof","root","address","data"):
     #         if not getattr(msg, key, None):
@@ -376,7 +612,7 @@ async def rpc_verify(ctx: Context, sender: str, msg: VerifyProofRequest):
         # 1) basic shape check
         for key in ("proof","root","address","data"):
             if not getattr(msg, key, None):
-                await ctx.send(sender, VerifyProofResponse(
+                await ctx.send(sender, response(
                     request_id=msg.request_id, ok=False,
                     error=Error(code="BAD_REQUEST", message=f"Missing '{key}'")
                 ))
@@ -385,22 +621,49 @@ async def rpc_verify(ctx: Context, sender: str, msg: VerifyProofRequest):
         # 2) call upstream
         report = await verification_service.verify(
             proof=msg.proof, root=msg.root, address=msg.address, data=msg.data,
-            request_id=f"rpc-{msg.request_id}"
+            request_id=f"rpc-{msg.request_id}", report=with_report
         )
         if not report:
-            await ctx.send(sender, VerifyProofResponse(
+            await ctx.send(sender, response(
                 request_id=msg.request_id, ok=False,
                 error=Error(code="INTERNAL", message="Verify failed (empty report)")
             ))
             return
 
-        await ctx.send(sender, VerifyProofResponse(
+        if response is VerifyReportResponse:
+            file = report_file(report)
+            if not file:
+                await ctx.send(sender, response(
+                    request_id=msg.request_id, ok=False,
+                    error=Error(code="INTERNAL", message="Upstream returned no report")
+                ))
+                return
+            await ctx.send(sender, response(
+                request_id=msg.request_id, ok=True, download_url=file["download_url"], report=report
+            ))
+            return
+
+        await ctx.send(sender, response(
             request_id=msg.request_id, ok=True, report=report
         ))
 
+    except ProofRejected as e:
+        # Rejected locally, nothing was sent upstream
+        await ctx.send(sender, response(
+            request_id=msg.request_id, ok=False,
+            error=Error(code="BAD_REQUEST", message=f"Invalid proof: {e}")
+        ))
+
+    except (CircuitOpenError, OverloadedError) as e:
+        # Upstream failing repeatedly or at its concurrency limit; nothing was sent
+        await ctx.send(sender, response(
+            request_id=msg.request_id, ok=False,
+            error=_upstream_error(e)
+        ))
+
     except httpx.TimeoutException as e:
         ctx.logger.exception("rpc_verify timeout")
-        await ctx.send(sender, VerifyProofResponse(
+        await ctx.send(sender, response(
             request_id=msg.request_id, ok=False,
             error=Error(code="TIMEOUT", message="Upstream verify timed out")
         ))
@@ -411,7 +674,7 @@ async def rpc_verify(ctx: Context, sender: str, msg: VerifyProofRequest):
         body_preview = (e.response.text or "")[:300]
         code = "BAD_REQUEST" if 400 <= status < 500 else "INTERNAL"
         ctx.logger.exception("rpc_verify HTTPStatusError")
-        await ctx.send(sender, VerifyProofResponse(
+        await ctx.send(sender, response(
             request_id=msg.request_id, ok=False,
             error=Error(code=code, message=f"HTTP {status}: {body_preview}")
         ))
@@ -419,7 +682,7 @@ async def rpc_verify(ctx: Context, sender: str, msg: VerifyProofRequest):
     except httpx.HTTPError as e:
         # DNS/Connect/Protocol errors, etc.
         ctx.logger.exception("rpc_verify HTTPError")
-        await ctx.send(sender, VerifyProofResponse(
+        await ctx.send(sender, response(
             request_id=msg.request_id, ok=False,
             error=Error(code="INTERNAL", message=f"{e.__class__.__name__}: {e!s}")
         ))
@@ -428,7 +691,7 @@ async def rpc_verify(ctx: Context, sender: str, msg: VerifyProofRequest):
         # Anything else; include type + short traceback for your logs
         tb = traceback.format_exc(limit=5)
         ctx.logger.error(f"rpc_verify error: {e!r}\n{tb}")
-        await ctx.send(sender, VerifyProofResponse(
+        await ctx.send(sender, response(
             request_id=msg.request_id, ok=False,
             error=Error(code="INTERNAL", message=f"{e.__class__.__name__}")
         ))
@@ -439,6 +702,59 @@ async def handle_ack(ctx: Context, sender: str, msg: ChatAcknowledgement):
         f"Got an acknowledgement from {sender} for {msg.acknowledged_msg_id}"
     )
 
+# Resume stamps that were still waiting for confirmation when the process stopped
+_resumed_tasks = set()
+
+async def _resume_chat_stamp(ctx: Context, entry: dict):
+    uid, sender, request_id = entry["uid"], entry["sender"], entry["request_id"]
+    try:
+        result = await stamping_service.confirm(uid, request_id)
+        if result["onchain"]:
+            await _reply(ctx, sender, final_hash_confirmation(result), end_session=True)
+        else:
+            await _reply(ctx, sender, result["message"], end_session=True)
+        stamp_journal.complete(uid, sender, request_id)
+    except Exception:
+        ctx.logger.exception(f"Failed to resume stamp {uid}")
+
+@agent.on_event("startup")
+async def resume_pending_stamps(ctx: Context):
+    pending = stamp_journal.pending()
+    if not pending:
+        return
+    ctx.logger.info(f"Resuming {len(pending)} stamp(s) awaiting on-chain confirmation")
+    for entry in pending:
+        if entry["channel"] == "chat":
+            task = asyncio.create_task(_resume_chat_stamp(ctx, entry))
+            _resumed_tasks.add(task)
+            task.add_done_callback(_resumed_tasks.discard)
+        else:
+            _respond_when_onchain(ctx, entry["sender"], entry["request_id"], entry["uid"], entry["channel"])
+
+@agent.on_event("startup")
+async def warm_up_http_pools(ctx: Context):
+    # Open keep-alive connections (TCP + TLS) to every upstream before the first request needs one
+    pools = (integ.pool, asi.pool, storage_client.pool)
+    await asyncio.gather(*(pool.warm_up(HTTP_WARMUP_CONNECTIONS) for pool in pools))
+    warmed = ", ".join(f"{pool.name}={pool.counters['warmed']}" for pool in pools)
+    ctx.logger.info(f"HTTP connections opened at startup: {warmed}")
+
+@agent.on_event("shutdown")
+async def close_resources(ctx: Context):
+    # Close the upstream connection pools, then the executor and the on-disk stores
+    await asyncio.gather(integ.aclose(), asi.aclose(), storage_client.aclose(), return_exceptions=True)
+    hashing_service.close()
+    stamp_journal.close()
+    proof_cache.close()
+    ctx.logger.info("HTTP pools, hashing executor, stamp journal and proof cache closed")
+
+class MetricsResponse(Model):
+    metrics: Dict[str, Any]
+
+@agent.on_rest_get("/metrics", MetricsResponse)
+async def get_metrics(ctx: Context) -> MetricsResponse:
+    return MetricsResponse(metrics=metrics.snapshot())
+
 agent.include(protocol, publish_manifest=True)
 agent.include(IntegritasProtocol, publish_manifest=True)
 
@@ -0,0 +1,48 @@
+"""
+Compare the streaming upload hash path with the old decode-everything path.
+
+    python -m app.benchmarks.hashing --size-mb 100
+
+Reports digest, peak traced memory and throughput for both paths on a random
+base64 payload of the given decoded size.
+"""
+import argparse
+import base64
+import hashlib
+import os
+import time
+import tracemalloc
+
+from app.services.hashing_service import HashingService
+
+
+def _old_path(contents: str) -> str:
+    return hashlib.sha3_256(base64.b64decode(contents)).hexdigest()
+
+
+def _measure(label: str, fn, contents: str, size: int):
+    tracemalloc.start()
+    started = time.perf_counter()
+    digest = fn(contents)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:<10} {digest[:16]}…  peak {peak / 1e6:8.1f} MB  {size / 1e6 / elapsed:8.1f} MB/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=int, default=64, help="decoded payload size in MB")
+    args = parser.parse_args()
+
+    size = args.size_mb * 1_000_000
+    contents = base64.b64encode(os.urandom(size)).decode("ascii")
+    print(f"payload: {size / 1e6:.0f} MB decoded, {len(contents) / 1e6:.0f} MB base64")
+
+    service = HashingService()
+    _measure("old", _old_path, contents, size)
+    _measure("streaming", lambda c: service.hash_upload_contents(c)[0], contents, size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Throughput of the local proof checks in app.services.mmr_proof.
+
+    python -m app.benchmarks.proofs --count 20000 --chunks 24
+
+Builds random, well-formed proofs with the given number of chunks and reports
+proofs/s of the structural check.
+"""
+import argparse
+import os
+import random
+import time
+
+from app.services.mmr_proof import ZERO, Chunk, Number, Proof, _mini_data, _mini_number, check_proof_structure
+
+
+def _serialize(proof: Proof) -> str:
+    raw = _mini_number(proof.blocktime) + _mini_number(Number(len(proof.chunks), 0))
+    for chunk in proof.chunks:
+        raw += bytes([1 if chunk.is_left else 0]) + _mini_data(chunk.hash) + _mini_number(chunk.value)
+    return "0x" + raw.hex().upper()
+
+
+def _make(chunks: int) -> dict:
+    proof = Proof(Number(random.randrange(1 << 30), 0), [Chunk(random.random() < 0.5, os.urandom(32), ZERO) for _ in range(chunks)])
+    return {
+        "proof": _serialize(proof),
+        "root": "0x" + os.urandom(32).hex().upper(),
+        "address": "0xFFEEDD",
+        "data": "0x" + os.urandom(32).hex().upper(),
+    }
+
+
+def _measure(label: str, items: list):
+    started = time.perf_counter()
+    for item in items:
+        check_proof_structure(item["proof"], item["root"], item["address"], item["data"])
+    elapsed = time.perf_counter() - started
+    print(f"{label:<11} {len(items) / elapsed:10.0f} proofs/s  ({elapsed * 1e6 / len(items):.1f} µs/proof)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=20000, help="proofs to check")
+    parser.add_argument("--chunks", type=int, default=24, help="chunks per proof (MMR depth)")
+    args = parser.parse_args()
+
+    items = [_make(args.chunks) for _ in range(args.count)]
+    print(f"{args.count} proofs, {args.chunks} chunks each")
+    _measure("structural", items)
+
+
+if __name__ == "__main__":
+    main()
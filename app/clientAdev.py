@@ -39,6 +39,13 @@ class UidResponse(BaseResponse):
     address: Optional[str] = None
     data: Optional[str] = None
 
+# ----- Status Subscription -----
+class SubscribeUidRequest(BaseRequest):
+    uid: str
+
+class SubscribeUidResponse(BaseResponse):
+    pass  # acknowledges the subscription; a UidResponse with the same request_id follows on confirmation
+
 # -----------------------
 # Config
 # -----------------------
@@ -68,15 +75,20 @@ async def on_stamp_resp(ctx: Context, sender: str, msg: StampHashResponse):
     if fut and not fut.done():
         fut.set_result(msg)
 
-    # Fire-and-forget status check (only if stamping succeeded and we have a UID)
+    # Subscribe to the on-chain status (only if stamping succeeded and we have a UID).
+    # The provider pushes a UidResponse once the UID is confirmed, no need to wait before asking.
     if msg.ok and msg.uid:
-        ctx.logger.info("Stamp succeeded; waiting 10s before sending status request…")
-        await asyncio.sleep(10)
-        await ctx.send(sender, UidRequest(request_id=str(uuid4()), uid=msg.uid))
+        ctx.logger.info("Stamp succeeded; subscribing to on-chain confirmation…")
+        await ctx.send(sender, SubscribeUidRequest(request_id=str(uuid4()), uid=msg.uid))
     else:
         ctx.logger.warning(f"Stamp failed or missing UID: {msg.error}")
 
 
+@consumer.on_message(SubscribeUidResponse)
+async def on_subscribe_resp(ctx: Context, sender: str, msg: SubscribeUidResponse):
+    if not msg.ok:
+        ctx.logger.warning(f"Subscription failed: {msg.error}")
+
 @consumer.on_message(UidResponse)
 async def on_uid_resp(ctx: Context, sender: str, msg: UidResponse):
     """We’re using Pattern A, so just log whatever comes back from status."""
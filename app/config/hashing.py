@@ -0,0 +1,29 @@
+"""
+Hashing settings, kept apart from app.config.settings so local hashing
+(python -m app.hashing scan) runs without the agent's API keys.
+"""
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+ROOT = Path(__file__).resolve().parents[2]
+load_dotenv(ROOT / ".env")
+
+# Hashing
+HASH_CHUNK_SIZE = int(os.getenv("HASH_CHUNK_SIZE", str(1 << 20)))  # chars/bytes decoded and hashed per step
+HASH_EXECUTOR = os.getenv("HASH_EXECUTOR", "thread")  # thread | process
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+HASH_INLINE_THRESHOLD = int(os.getenv("HASH_INLINE_THRESHOLD", str(256 * 1024)))  # smaller uploads hash on the event loop
+HASH_MAX_CONCURRENT = int(os.getenv("HASH_MAX_CONCURRENT", str(HASH_WORKERS)))
+# Digests computed next to SHA3-256 in the same pass and kept in the hash record (comma separated hashlib
+# names, e.g. "sha256,blake2b"). Off by default: each one adds about as much CPU as the SHA3-256 itself
+HASH_EXTRA_DIGESTS = [a.strip() for a in os.getenv("HASH_EXTRA_DIGESTS", "").split(",") if a.strip()]
+# flat: one SHA3-256 stream (default). merkle: fixed-size leaves hashed in parallel, the root is stamped
+HASH_MODE = os.getenv("HASH_MODE", "flat")
+MERKLE_LEAF_SIZE = int(os.getenv("MERKLE_LEAF_SIZE", str(4 << 20)))
+# Local files at least this large are memory-mapped instead of read (python -m app.hashing)
+HASH_MMAP_THRESHOLD = int(os.getenv("HASH_MMAP_THRESHOLD", str(1 << 20)))
+
+# Drop-folder watcher (python -m app.hashing watch): (path, size, mtime, inode) -> digest/uid/proof index
+WATCH_INDEX_PATH = os.getenv("WATCH_INDEX_PATH", str(ROOT / "watch_index.sqlite3"))
+WATCH_INTERVAL_SECONDS = float(os.getenv("WATCH_INTERVAL_SECONDS", "60"))
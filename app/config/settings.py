@@ -17,6 +17,47 @@ INTEGRITAS_BASE_URL = "https://integritas.minima.global/core"
 
 # Storage
 STORAGE_URL = os.getenv("AGENTVERSE_URL", "https://agentverse.ai") + "/v1/storage"
+DOWNLOAD_MAX_CONCURRENCY = int(os.getenv("DOWNLOAD_MAX_CONCURRENCY", "4"))  # attachment downloads in flight
+DOWNLOAD_TIMEOUT_SECONDS = float(os.getenv("DOWNLOAD_TIMEOUT_SECONDS", "30"))  # per attachment, end to end
+
+# HTTP connection pools, one shared client per upstream: max connections, idle connections kept alive,
+# seconds an idle connection is kept, HTTP/2 (needs the h2 package, otherwise HTTP/1.1 is used)
+INTEGRITAS_HTTP_MAX_CONNECTIONS = int(os.getenv("INTEGRITAS_HTTP_MAX_CONNECTIONS", "32"))
+INTEGRITAS_HTTP_MAX_KEEPALIVE = int(os.getenv("INTEGRITAS_HTTP_MAX_KEEPALIVE", "16"))
+INTEGRITAS_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("INTEGRITAS_HTTP_KEEPALIVE_EXPIRY", "60"))
+INTEGRITAS_HTTP2 = os.getenv("INTEGRITAS_HTTP2", "false").lower() == "true"
+ASI_HTTP_MAX_CONNECTIONS = int(os.getenv("ASI_HTTP_MAX_CONNECTIONS", "16"))
+ASI_HTTP_MAX_KEEPALIVE = int(os.getenv("ASI_HTTP_MAX_KEEPALIVE", "8"))
+ASI_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("ASI_HTTP_KEEPALIVE_EXPIRY", "60"))
+ASI_HTTP2 = os.getenv("ASI_HTTP2", "false").lower() == "true"
+STORAGE_HTTP_MAX_CONNECTIONS = int(os.getenv("STORAGE_HTTP_MAX_CONNECTIONS", "8"))
+STORAGE_HTTP_MAX_KEEPALIVE = int(os.getenv("STORAGE_HTTP_MAX_KEEPALIVE", "4"))
+STORAGE_HTTP_KEEPALIVE_EXPIRY = float(os.getenv("STORAGE_HTTP_KEEPALIVE_EXPIRY", "60"))
+STORAGE_HTTP2 = os.getenv("STORAGE_HTTP2", "false").lower() == "true"
+HTTP_WARMUP_CONNECTIONS = int(os.getenv("HTTP_WARMUP_CONNECTIONS", "2"))  # opened per upstream at startup, 0 disables
+
+# Retries of idempotent upstream calls (status, proof file link, verify, ASI completions): attempts include the
+# first call, exponential backoff with full jitter; a Retry-After on 429/503 is honored up to RETRY_AFTER_MAX_SECONDS
+RETRY_ATTEMPTS = int(os.getenv("RETRY_ATTEMPTS", "3"))
+RETRY_BASE_DELAY_SECONDS = float(os.getenv("RETRY_BASE_DELAY_SECONDS", "0.5"))
+RETRY_MAX_DELAY_SECONDS = float(os.getenv("RETRY_MAX_DELAY_SECONDS", "8"))
+RETRY_AFTER_MAX_SECONDS = float(os.getenv("RETRY_AFTER_MAX_SECONDS", "30"))
+RETRY_BUDGET_SECONDS = float(os.getenv("RETRY_BUDGET_SECONDS", "60"))  # no retry starts later than this after the first attempt
+
+# Circuit breaker per upstream endpoint: opens after CIRCUIT_FAILURE_THRESHOLD consecutive failures
+# (transport errors, 429, 5xx), fails fast for CIRCUIT_RESET_SECONDS, then lets one trial call through
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_SECONDS = float(os.getenv("CIRCUIT_RESET_SECONDS", "30"))
+
+# Bulkheads for the expensive upstream endpoints: calls in flight, callers allowed to queue for a slot, and how
+# long a queued caller waits before getting an overloaded (TIMEOUT) error
+STAMP_MAX_IN_FLIGHT = int(os.getenv("STAMP_MAX_IN_FLIGHT", "16"))  # /v1/timestamp/post
+STAMP_MAX_QUEUE = int(os.getenv("STAMP_MAX_QUEUE", "256"))
+VERIFY_MAX_IN_FLIGHT = int(os.getenv("VERIFY_MAX_IN_FLIGHT", "8"))  # /v1/verify/post-lite-pdf
+VERIFY_MAX_QUEUE = int(os.getenv("VERIFY_MAX_QUEUE", "64"))
+ASI_MAX_IN_FLIGHT = int(os.getenv("ASI_MAX_IN_FLIGHT", "8"))  # ASI /chat/completions
+ASI_MAX_QUEUE = int(os.getenv("ASI_MAX_QUEUE", "64"))
+BULKHEAD_QUEUE_TIMEOUT_SECONDS = float(os.getenv("BULKHEAD_QUEUE_TIMEOUT_SECONDS", "30"))
 
 # Agent
 AGENT_SEED = os.getenv("AGENT_SEED", "AGENT_SEED")
@@ -24,8 +65,71 @@ AGENT_PORT = int(os.getenv("AGENT_PORT", "AGENT_PORT"))
 AGENT_ENDPOINT = os.getenv("AGENT_ENDPOINT", "AGENT_ENDPOINT")
 
 # Polling
+# Deprecated: POLL_MAX_ATTEMPTS checks POLL_DELAY_SECONDS apart. When either is set, the defaults below
+# reproduce that fixed schedule (first check at once, no jitter, deadline = attempts x delay)
 POLL_MAX_ATTEMPTS = int(os.getenv("POLL_MAX_ATTEMPTS", "10"))
-POLL_DELAY_SECONDS = int(os.getenv("POLL_DELAY_SECONDS", "10"))
+POLL_DELAY_SECONDS = float(os.getenv("POLL_DELAY_SECONDS", "10"))
+_POLL_LEGACY = "POLL_MAX_ATTEMPTS" in os.environ or "POLL_DELAY_SECONDS" in os.environ
+if _POLL_LEGACY:
+    print("⚠️ POLL_MAX_ATTEMPTS / POLL_DELAY_SECONDS are deprecated, polling every "
+          f"{POLL_DELAY_SECONDS:g}s for {POLL_MAX_ATTEMPTS * POLL_DELAY_SECONDS:g}s; see POLL_BASE_DELAY_SECONDS in app/README.md")
+
+POLL_SCHEDULE = os.getenv("POLL_SCHEDULE", "fixed" if _POLL_LEGACY else "exponential")  # fixed | exponential | fibonacci
+POLL_INITIAL_DELAY_SECONDS = float(os.getenv("POLL_INITIAL_DELAY_SECONDS", "0" if _POLL_LEGACY else "5"))  # nothing confirms right after stamping
+POLL_BASE_DELAY_SECONDS = float(os.getenv("POLL_BASE_DELAY_SECONDS", str(POLL_DELAY_SECONDS) if _POLL_LEGACY else "2"))  # base step of the backoff
+POLL_MAX_DELAY_SECONDS = float(os.getenv("POLL_MAX_DELAY_SECONDS", str(max(POLL_BASE_DELAY_SECONDS, 20))))
+POLL_JITTER = float(os.getenv("POLL_JITTER", "0" if _POLL_LEGACY else "0.2"))  # +/- fraction applied to every delay
+POLL_DEADLINE_SECONDS = float(os.getenv(  # confirmation takes at most ~3 minutes
+    "POLL_DEADLINE_SECONDS", str(POLL_MAX_ATTEMPTS * POLL_DELAY_SECONDS) if _POLL_LEGACY else "240"
+))
+POLL_TICK_SECONDS = float(os.getenv("POLL_TICK_SECONDS", "1"))  # minimum spacing between batched status calls
+POLL_BATCH_SIZE = int(os.getenv("POLL_BATCH_SIZE", "100"))  # max uids per /v1/timestamp/status call
+
+# UidRequest handling: "wait" replies once the uid is on-chain, "immediate" replies with the current status
+UID_REQUEST_MODE = os.getenv("UID_REQUEST_MODE", "wait")
+
+# Identical stamps within this many seconds of a successful stamp reuse its uid instead of posting the hash again
+STAMP_DEDUP_TTL_SECONDS = float(os.getenv("STAMP_DEDUP_TTL_SECONDS", "240"))
+
+# Batch RPC
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "10000"))  # per StampHashBatchRequest / UidBatchRequest
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))  # upstream stamp calls in flight per batch
+
+# Journal of stamps awaiting confirmation, replayed on startup
+STAMP_JOURNAL_PATH = os.getenv("STAMP_JOURNAL_PATH", str(ROOT / "stamp_journal.sqlite3"))
+
+# Proofs of confirmed uids: in-memory LRU in front of an on-disk store
+PROOF_CACHE_SIZE = int(os.getenv("PROOF_CACHE_SIZE", "100000"))
+PROOF_STORE_PATH = os.getenv("PROOF_STORE_PATH", str(ROOT / "proof_cache.sqlite3"))
+
+# Verification results keyed by (proof, root, address, data); report links expire after 1 hour
+VERIFY_CACHE_SIZE = int(os.getenv("VERIFY_CACHE_SIZE", "10000"))
+VERIFY_CACHE_TTL_SECONDS = float(os.getenv("VERIFY_CACHE_TTL_SECONDS", "86400"))
+VERIFY_REPORT_LINK_TTL_SECONDS = float(os.getenv("VERIFY_REPORT_LINK_TTL_SECONDS", "3300"))  # 55 min, margin before expiry
+
+# Channels (chat, rpc) whose verifications ask Integritas for the PDF report by default; generating
+# it dominates verify latency. Both by default, so VerifyProofRequest keeps returning data.file; RPC callers
+# opt out per request with VerifyProofOptionsRequest(report=False) and can fetch it later (VerifyReportRequest)
+VERIFY_REPORT_CHANNELS = [c.strip() for c in os.getenv("VERIFY_REPORT_CHANNELS", "chat,rpc").split(",") if c.strip()]
+
+# Local proof check before the upstream verify call: off | structural (fields are hex, proof deserializes).
+# The MMR root is not recomputed locally, so tampered but well-formed proofs are left to the verify endpoint
+PROOF_PRECHECK = os.getenv("PROOF_PRECHECK", "structural")
+
+# Proof files with several entries are verified VERIFY_BATCH_SIZE entries per upstream call
+VERIFY_BATCH_SIZE = int(os.getenv("VERIFY_BATCH_SIZE", "100"))
+VERIFY_BATCH_CONCURRENCY = int(os.getenv("VERIFY_BATCH_CONCURRENCY", "4"))
+
+# LLM explanations of verification results, keyed on the result without volatile fields
+EXPLANATION_CACHE_SIZE = int(os.getenv("EXPLANATION_CACHE_SIZE", "5000"))
+EXPLANATION_CACHE_TTL_SECONDS = float(os.getenv("EXPLANATION_CACHE_TTL_SECONDS", "86400"))
+
+# Hashing and the drop-folder watcher live in app.config.hashing, which needs no API keys
+# (python -m app.hashing runs without agent credentials); re-exported for the agent
+from app.config.hashing import (
+    HASH_CHUNK_SIZE, HASH_EXECUTOR, HASH_WORKERS, HASH_INLINE_THRESHOLD, HASH_MAX_CONCURRENT, HASH_EXTRA_DIGESTS,
+    HASH_MODE, MERKLE_LEAF_SIZE, HASH_MMAP_THRESHOLD, WATCH_INDEX_PATH, WATCH_INTERVAL_SECONDS,
+)
 
 # Subject matter prompt (kept here for clarity)
 SUBJECT_MATTER = """blockchain hash stamping and validation using the Integritas API. Your primary function is to help users with:
@@ -49,6 +49,62 @@ def final_hash_confirmation(result: dict) -> str:
 
     return message
 
+def batch_hash_confirmation(files: list[dict]) -> str:
+    """
+    One confirmation table for several stamped files.
+
+    Args:
+        files: [{"filename", "hash", "result"}] where result comes from stamping_service.stamp_hashes()
+    """
+    rows = []
+    confirmed = 0
+    for i, item in enumerate(files, start=1):
+        result = item["result"]
+        if not result["success"]:
+            status = "❌ Failed"
+        elif result.get("onchain"):
+            status = "✅ On-chain"
+            confirmed += 1
+        else:
+            status = "⏳ Pending"
+        link = f"[Proof File ↓]({result['downloadLink']})" if result.get("downloadLink") else "–"
+        uid = shorten_string(result["uid"]) if result.get("uid") else "–"
+        rows.append(f"| {i} | {item['filename']} | `{shorten_string(item['hash'], 8, 6)}` | {uid} | {status} | {link} |")
+
+    message = (
+        f"🎉 {confirmed} of {len(files)} files confirmed on blockchain!\n\n"
+        "| # | File | Hash | UID | Status | Proof |\n|---|---|---|---|---|---|\n"
+        + "\n".join(rows)
+        + "\n"
+    )
+    proofs = [{"file": item["filename"], **item["result"]["proof"]} for item in files if item["result"].get("proof")]
+    if proofs:
+        message += (
+            "\n**Proof Data:**\n"
+            "```json\n"
+            f"{json.dumps(proofs, indent=2)}\n"
+            "```\n"
+        )
+    if any(item["result"].get("downloadLink") for item in files):
+        message += (
+            "\n💡 **Note:** \n\n"
+            "• The download links are valid for 1 hour and can be shared with others.\n\n"
+        )
+    return message
+
+def changed_ranges_notice(filename: str, changes: list[dict], limit: int = 10) -> str:
+    """
+    Which parts of a file changed since its previous stamp.
+
+    Args:
+        filename: The uploaded file's name
+        changes: Byte ranges from hashing_service.diff_upload()
+    """
+    rows = [f"• bytes {c['start']:,}–{c['end']:,} (leaf {c['leaf']})" for c in changes[:limit]]
+    if len(changes) > limit:
+        rows.append(f"• … and {len(changes) - limit} more")
+    return f"🔎 **{filename}** changed since you last stamped it:\n\n" + "\n".join(rows)
+
 def verification_report(verification_result: dict, ai_reasoning: str) -> str:
     try:
         result = verification_result["data"]["verification"]["data"]["result"]
@@ -62,7 +118,8 @@ def verification_report(verification_result: dict, ai_reasoning: str) -> str:
         # txpow_id = bd["txpow_id"]
         # transaction_id = bd["transactionid"]
         # txnid = verification_result["data"]["verification"]["data"]["nfttxnid"]
-        download_link = verification_result["data"]["file"]["download_url"]
+        # No report link when verified without a report (VERIFY_REPORT_CHANNELS)
+        download_link = (verification_result["data"].get("file") or {}).get("download_url")
 
         # No links per your prompt policy—just show ids
         table = (
@@ -74,13 +131,16 @@ def verification_report(verification_result: dict, ai_reasoning: str) -> str:
             # f"| **Txn ID** | [{shorten_string(transaction_id)}  ↗](https://explorer.minima.global/transactions/{transaction_id}) |\n"
             # f"| **NFT Proof** | [{shorten_string(txnid)}  ↗](https://explorer.minima.global/transactions/{txnid}) |\n"
         )
-        return (
-            "🎉 Proof Verified!\n\nYour proof has been successfully verified.\n\n"
-            f"{table}\n\n"
+        report_section = (
             f"### Full Verification Report \n\n"
             f"**Download Link:**  [Report File ↓]({download_link})\n\n"
             "💡 **Note:** \n\n"
             "• This download link is valid for 1 hour and can be shared with others.\n\n---\n"
+        ) if download_link else "---\n"
+        return (
+            "🎉 Proof Verified!\n\nYour proof has been successfully verified.\n\n"
+            f"{table}\n\n"
+            f"{report_section}"
             
             "## Intelligent analysis\n\n"
             "(AI can make mistakes. Check important info.)\n\n---\n"
@@ -94,3 +154,51 @@ def verification_report(verification_result: dict, ai_reasoning: str) -> str:
         f"{ai_reasoning}\n\n---\n"
         "Visit [Integritas ↗](https://integritas.minima.global) for more information."
     )
+
+_MAX_REPORT_ROWS = 50  # longer proof files only list their problems past this
+
+def batch_verification_report(report: dict) -> str:
+    """
+    One report for all entries of the uploaded proof file(s).
+
+    Args:
+        report: The aggregated result of verification_service.verify_many()
+    """
+    labels = {"match": "✅ Match", "no match": "❌ No match", "rejected": "⛔ Invalid proof", "error": "⚠️ Not verified"}
+    items = report["items"]
+    if len(items) > _MAX_REPORT_ROWS:
+        items = [item for item in items if item["status"] != "match"][:_MAX_REPORT_ROWS]
+    rows = []
+    for item in items:
+        if item["status"] == "match":
+            detail = f"{item['block_date']} UTC" if item["block_date"] else ""
+        else:
+            detail = item["error"] or ""
+        rows.append(f"| {item['index'] + 1} | `{shorten_string(str(item['data'] or '–'), 8, 6)}` | {labels.get(item['status'], item['status'])} | {detail} |")
+
+    headline = "🎉 All proofs verified!" if report["matched"] == report["total"] else "✅ Verification completed"
+    message = (
+        f"{headline}\n\n"
+        "## Verification Report\n\n"
+        "|  |  |\n|---|---|\n"
+        f"| **Proofs** | {report['total']} |\n"
+        f"| **Matched** | {report['matched']} |\n"
+        f"| **Not matched** | {report['unmatched']} |\n"
+        f"| **Invalid** | {report['rejected']} |\n"
+        f"| **Not verified** | {report['failed']} |\n\n"
+        "| # | Data | Result | Details |\n|---|---|---|---|\n"
+        + "\n".join(rows)
+        + "\n\n"
+    )
+    if len(items) < len(report["items"]):
+        message += f"_{len(report['items']) - len(items)} more entries not listed; matched entries are omitted for long files._\n\n"
+    if report["reports"]:
+        links = "\n".join(f"• [Report File {n} ↓]({url})" for n, url in enumerate(report["reports"], start=1))
+        message += (
+            "### Full Verification Reports \n\n"
+            f"{links}\n\n"
+            "💡 **Note:** \n\n"
+            "• These download links are valid for 1 hour and can be shared with others.\n\n---\n"
+        )
+    return message + "Visit [Integritas ↗](https://integritas.minima.global) for more information."
+
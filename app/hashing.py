@@ -0,0 +1,204 @@
+"""
+Bulk SHA3-256 fingerprinting of local directory trees.
+
+    python -m app.hashing scan /data/archive -o manifest.jsonl
+
+Walks the tree (symlinks are not followed), hashes files across a process pool
+(large files are memory-mapped) and writes a JSON Lines manifest with one
+{"path", "size", "mtime", "sha3_256"} object per file, paths relative to the
+scanned root. Files that cannot be read are reported on stderr and left out.
+Throughput (files/s, MB/s) is printed when the run finishes.
+
+The manifest feeds straight into batch stamping: iter_stamp_batches() yields
+lists of unique hashes sized for StampHashBatchRequest.
+
+    python -m app.hashing watch /data/drop --interval 60
+
+Keeps a drop folder stamped: every interval, only new or modified files (by
+size, mtime and inode) are hashed and stamped, and their uid and proof are
+recorded in the watch index (WATCH_INDEX_PATH). --once runs a single scan and
+waits for its confirmations.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# app.config.hashing needs no API keys, so scanning works without agent credentials
+from app.config.hashing import (
+    HASH_CHUNK_SIZE,
+    HASH_MMAP_THRESHOLD,
+    HASH_WORKERS,
+    WATCH_INDEX_PATH,
+    WATCH_INTERVAL_SECONDS,
+)
+from app.services.hashing_service import hash_files
+
+
+def walk(root: str) -> Iterator[str]:
+    """Regular files under root, depth first, without following symlinks."""
+    return (entry.path for entry in walk_entries(root))
+
+
+def walk_entries(root: str) -> Iterator[os.DirEntry]:
+    """walk(), yielding the os.DirEntry of each file (its stat() is cached)."""
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        elif entry.is_file(follow_symlinks=False):
+                            yield entry
+                    except OSError as e:
+                        print(f"Skipping {entry.path}: {e}", file=sys.stderr)
+        except OSError as e:
+            print(f"Skipping {directory}: {e}", file=sys.stderr)
+
+
+def _batched(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def scan(
+    paths: Iterable[str],
+    workers: int = HASH_WORKERS,
+    batch_files: int = 64,
+    chunk_size: int = HASH_CHUNK_SIZE,
+    mmap_threshold: int = HASH_MMAP_THRESHOLD,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Hash paths on a process pool, yielding hash_file results in input order
+
+    Paths are sent in batches of batch_files, with at most 4 batches per worker in
+    flight, so memory stays flat however many files there are.
+    """
+    window = max(1, workers) * 4
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for batch in _batched(paths, batch_files):
+            pending.append(pool.submit(hash_files, batch, chunk_size, mmap_threshold))
+            if len(pending) >= window:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def iter_stamp_batches(manifest_path: str, batch_size: Optional[int] = None) -> Iterator[List[str]]:
+    """
+    Unique hashes from a manifest, in lists of at most batch_size
+
+    Each list can be sent as StampHashBatchRequest(hashes=...). batch_size
+    defaults to the agent's BATCH_MAX_ITEMS, read from app.config.settings.
+    """
+    if batch_size is None:
+        from app.config.settings import BATCH_MAX_ITEMS
+        batch_size = BATCH_MAX_ITEMS
+    seen = set()
+    batch = []
+    with open(manifest_path, encoding="utf-8") as f:
+        for line in f:
+            hash_value = json.loads(line)["sha3_256"]
+            if hash_value in seen:
+                continue
+            seen.add(hash_value)
+            batch.append(hash_value)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def _scan_command(args):
+    root = os.path.abspath(args.root)
+    out = open(args.output, "w", encoding="utf-8") if args.output != "-" else sys.stdout
+    files = errors = total_bytes = 0
+    started = time.perf_counter()
+    try:
+        for entry in scan(walk(root), args.workers, args.batch_files, mmap_threshold=args.mmap_threshold):
+            if "error" in entry:
+                errors += 1
+                print(f"Could not hash {entry['path']}: {entry['error']}", file=sys.stderr)
+                continue
+            entry["path"] = os.path.relpath(entry["path"], root).replace(os.sep, "/")
+            out.write(json.dumps(entry) + "\n")
+            files += 1
+            total_bytes += entry["size"]
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = max(time.perf_counter() - started, 1e-9)
+    print(
+        f"Hashed {files} files ({total_bytes / 1e6:.1f} MB) in {elapsed:.2f}s: "
+        f"{files / elapsed:.0f} files/s, {total_bytes / 1e6 / elapsed:.1f} MB/s, {errors} errors",
+        file=sys.stderr,
+    )
+
+
+async def _watch(args):
+    from app.adapters.integritas_client import IntegritasClient
+    from app.services.directory_watcher import DirectoryWatcher, FileIndex
+    from app.services.hashing_service import HashingService
+    from app.services.poll_schedule import build_poll_schedule
+    from app.services.proof_cache import ProofCache
+    from app.services.stamping_service import StampingService
+    from app.services.status_poller import StatusPoller
+
+    integ = IntegritasClient()
+    stamping = StampingService(integ, StatusPoller(integ, build_poll_schedule(), cache=ProofCache()))
+    hashing = HashingService(executor="process", workers=args.workers)
+    index = FileIndex(args.index)
+    watcher = DirectoryWatcher(args.root, hashing, stamping, index, interval=args.interval)
+    try:
+        if args.once:
+            await watcher.scan_once()
+            await watcher.drain()
+        else:
+            await watcher.run()
+    finally:
+        index.close()
+        hashing.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.hashing", description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    scan_parser = commands.add_parser("scan", help="hash a directory tree into a manifest")
+    scan_parser.add_argument("root", help="directory to scan")
+    scan_parser.add_argument("-o", "--output", default="-", help="manifest path (JSON Lines), - for stdout")
+    scan_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="hashing processes")
+    scan_parser.add_argument("--batch-files", type=int, default=64, help="files per pool task")
+    scan_parser.add_argument("--mmap-threshold", type=int, default=HASH_MMAP_THRESHOLD, help="memory-map files of at least this many bytes")
+    scan_parser.set_defaults(func=_scan_command)
+
+    watch_parser = commands.add_parser("watch", help="hash and stamp new or modified files, repeatedly")
+    watch_parser.add_argument("root", help="directory to watch")
+    watch_parser.add_argument("--index", default=WATCH_INDEX_PATH, help="SQLite index of hashed files")
+    watch_parser.add_argument("--interval", type=float, default=WATCH_INTERVAL_SECONDS, help="seconds between scans")
+    watch_parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="hashing processes")
+    watch_parser.add_argument("--once", action="store_true", help="scan once, wait for confirmations and exit")
+    watch_parser.set_defaults(func=lambda args: asyncio.run(_watch(args)))
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
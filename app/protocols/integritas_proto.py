@@ -1,6 +1,6 @@
 # protocols/integritas_proto.py
 from uagents import Protocol, Model
-from typing import Literal, Optional, Dict, Any
+from typing import Literal, Optional, Dict, Any, List
 
 IntegritasProtocol = Protocol(
     name="integritas.v1",
@@ -41,6 +41,42 @@ class UidResponse(BaseResponse):
     address: Optional[str] = None
     data: Optional[str] = None
 
+# ----- Status Subscription -----
+class SubscribeUidRequest(BaseRequest):
+    uid: str
+
+class SubscribeUidResponse(BaseResponse):
+    pass  # acknowledges the subscription; a UidResponse with the same request_id follows on confirmation
+
+# ----- Batch Stamp Hash -----
+class StampHashBatchRequest(BaseRequest):
+    hashes: List[str]
+
+class StampHashItem(Model):
+    hash: str
+    ok: bool
+    uid: Optional[str] = None  # set when ok=True
+    error: Optional[Error] = None
+
+class StampHashBatchResponse(BaseResponse):
+    results: List[StampHashItem] = []  # same order as the request hashes
+
+# ----- Batch Status Check -----
+class UidBatchRequest(BaseRequest):
+    uids: List[str]
+
+class UidItem(Model):
+    uid: str
+    ok: bool
+    error: Optional[Error] = None
+    proof: Optional[str] = None
+    root: Optional[str] = None
+    address: Optional[str] = None
+    data: Optional[str] = None
+
+class UidBatchResponse(BaseResponse):
+    results: List[UidItem] = []  # same order as the request uids
+
 # ----- Verify Proof -----
 class VerifyProofRequest(BaseRequest):
     proof: str
@@ -49,4 +85,17 @@ class VerifyProofRequest(BaseRequest):
     data: str
 
 class VerifyProofResponse(BaseResponse):
-    report: Optional[Dict[str, Any]] = None  # raw API result (or normalized)
\ No newline at end of file
+    report: Optional[Dict[str, Any]] = None  # raw API result (or normalized)
+
+# ----- Verify Proof, with options -----
+# A separate message so VerifyProofRequest (and its schema digest) stays unchanged for existing clients
+class VerifyProofOptionsRequest(VerifyProofRequest):
+    report: Optional[bool] = None  # PDF report link in the result; None uses the agent's default for RPC
+
+# ----- Verification Report (lazy) -----
+class VerifyReportRequest(VerifyProofRequest):
+    pass  # same proof as an earlier report-less VerifyProofRequest
+
+class VerifyReportResponse(BaseResponse):
+    download_url: Optional[str] = None  # PDF report, valid for 1 hour
+    report: Optional[Dict[str, Any]] = None  # raw API result including data.file
\ No newline at end of file
@@ -0,0 +1,244 @@
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from app.config.hashing import WATCH_INDEX_PATH, WATCH_INTERVAL_SECONDS
+from app.hashing import walk_entries
+from app.services.hashing_service import HashingService
+from app.services.stamping_service import StampingService, new_request_id
+
+FileKey = Tuple[int, int, int]  # (size, mtime_ns, inode)
+
+
+class FileIndex:
+    """
+    Persistent (path, size, mtime, inode) -> digest index of a watched tree.
+
+    Each row also carries the uid the digest was stamped under and, once
+    confirmed, its on-chain proof. A file whose size, mtime and inode are
+    unchanged since the last scan is not read again.
+    """
+
+    def __init__(self, path: str = WATCH_INDEX_PATH):
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                sha3_256 TEXT NOT NULL,
+                uid TEXT,
+                proof TEXT,                     -- JSON {proof, root, address, data} once on-chain
+                hashed_at REAL NOT NULL
+            )
+            """
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS files_uid ON files (uid)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS files_digest ON files (sha3_256)")
+
+    def keys(self) -> Dict[str, FileKey]:
+        """Every indexed path with the (size, mtime_ns, inode) it was hashed at, in one query."""
+        return {path: (size, mtime_ns, inode) for path, size, mtime_ns, inode in self._db.execute("SELECT path, size, mtime_ns, inode FROM files")}
+
+    def update(self, rows: List[Tuple[str, FileKey, str]]):
+        """
+        Store new digests; a path whose digest changed loses its old uid and proof
+
+        Args:
+            rows: (path, (size, mtime_ns, inode), sha3_256)
+        """
+        now = time.time()
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany(
+                "INSERT INTO files (path, size, mtime_ns, inode, sha3_256, hashed_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns, inode = excluded.inode, "
+                "hashed_at = excluded.hashed_at, "
+                "uid = CASE WHEN sha3_256 = excluded.sha3_256 THEN uid END, "
+                "proof = CASE WHEN sha3_256 = excluded.sha3_256 THEN proof END, "
+                "sha3_256 = excluded.sha3_256",
+                [(path, *key, digest, now) for path, key, digest in rows],
+            )
+
+    def remove(self, paths: List[str]):
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("DELETE FROM files WHERE path = ?", [(p,) for p in paths])
+
+    def share_known_uids(self):
+        """Give rows without a uid the uid (and proof) of another path with the same digest, so it is not stamped twice."""
+        self._db.execute(
+            "UPDATE files SET (uid, proof) = ("
+            "  SELECT f.uid, f.proof FROM files f WHERE f.sha3_256 = files.sha3_256 AND f.uid IS NOT NULL"
+            "  ORDER BY f.proof IS NULL LIMIT 1"
+            ") WHERE uid IS NULL AND EXISTS (SELECT 1 FROM files f WHERE f.sha3_256 = files.sha3_256 AND f.uid IS NOT NULL)"
+        )
+
+    def unstamped(self) -> List[str]:
+        """Distinct digests that have no uid yet (new, changed, or a failed stamp)."""
+        return [row[0] for row in self._db.execute("SELECT DISTINCT sha3_256 FROM files WHERE uid IS NULL")]
+
+    def set_uids(self, stamped: List[Tuple[str, str]]):
+        """Record (digest, uid) pairs on every row of that digest still without a uid."""
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("UPDATE files SET uid = ? WHERE sha3_256 = ? AND uid IS NULL", [(uid, d) for d, uid in stamped])
+
+    def unconfirmed(self) -> List[str]:
+        """Distinct uids still waiting for their proof."""
+        return [row[0] for row in self._db.execute("SELECT DISTINCT uid FROM files WHERE uid IS NOT NULL AND proof IS NULL")]
+
+    def set_proofs(self, proofs: List[Tuple[str, Dict[str, Any]]]):
+        """Record (uid, proof) pairs."""
+        with self._db:
+            self._db.execute("BEGIN")
+            self._db.executemany("UPDATE files SET proof = ? WHERE uid = ?", [(json.dumps(p), uid) for uid, p in proofs])
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        cursor = self._db.execute("SELECT * FROM files WHERE path = ?", (path,))
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        entry = dict(zip([c[0] for c in cursor.description], row))
+        entry["proof"] = json.loads(entry["proof"]) if entry["proof"] else None
+        return entry
+
+    def close(self):
+        self._db.close()
+
+
+def stat_tree(root: str) -> Dict[str, FileKey]:
+    """(size, mtime_ns, inode) of every file walk() finds under root, one lstat per file."""
+    found = {}
+    for entry in walk_entries(root):
+        try:
+            st = entry.stat(follow_symlinks=False)
+        except OSError as e:
+            print(f"Skipping {entry.path}: {e}")
+            continue
+        found[entry.path] = (st.st_size, st.st_mtime_ns, st.st_ino)
+    return found
+
+
+class DirectoryWatcher:
+    """
+    Keeps a drop folder stamped: each scan hashes and stamps only new or modified files.
+
+    A scan stats the tree and compares it with the FileIndex in memory, so an
+    unchanged tree costs one lstat per file and no reads. Changed files are hashed
+    on the HashingService pool, their distinct digests stamped with
+    StampingService.stamp_many, and confirmations are awaited in the background
+    (batched by the status poller) and written back to the index.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        hashing: HashingService,
+        stamping: StampingService,
+        index: FileIndex,
+        interval: float = WATCH_INTERVAL_SECONDS,
+    ):
+        self.root = os.path.abspath(root)
+        self.hashing = hashing
+        self.stamping = stamping
+        self.index = index
+        self.interval = interval
+        self._confirming: Set[str] = set()
+        self._confirm_tasks: Set[asyncio.Task] = set()
+
+    async def scan_once(self) -> Dict[str, Any]:
+        """
+        One incremental pass over the tree
+
+        Returns:
+            {"files", "changed", "removed", "stamped", "failed", "seconds"}
+        """
+        started = time.perf_counter()
+        indexed = self.index.keys()
+        current = await asyncio.to_thread(stat_tree, self.root)
+        changed = [path for path, key in current.items() if indexed.get(path) != key]
+        removed = [path for path in indexed if path not in current]
+        if removed:
+            self.index.remove(removed)
+
+        if changed:
+            rows = []
+            for entry in await self.hashing.hash_local_files(changed):
+                if "error" in entry:
+                    print(f"Could not hash {entry['path']}: {entry['error']}")
+                    continue
+                # Keep the stat from before hashing: a file modified meanwhile is picked up next scan
+                rows.append((entry["path"], current[entry["path"]], entry["sha3_256"]))
+            self.index.update(rows)
+
+        stamped, failed = await self._stamp_pending()
+        self._confirm_pending()
+        summary = {
+            "files": len(current),
+            "changed": len(changed),
+            "removed": len(removed),
+            "stamped": stamped,
+            "failed": failed,
+            "seconds": round(time.perf_counter() - started, 3),
+        }
+        print(f"Scanned {self.root}: {summary}")
+        return summary
+
+    async def _stamp_pending(self) -> Tuple[int, int]:
+        self.index.share_known_uids()
+        digests = self.index.unstamped()
+        if not digests:
+            return 0, 0
+        request_id = new_request_id("watch")
+        uids = await self.stamping.stamp_many(digests, request_id)
+        stamped = []
+        for digest, uid in zip(digests, uids):
+            if isinstance(uid, str) and uid:
+                stamped.append((digest, uid))
+            else:
+                # Left without a uid, retried on the next scan
+                print(f"Failed to stamp {digest[:12]}…: {uid!r}")
+        self.index.set_uids(stamped)
+        return len(stamped), len(digests) - len(stamped)
+
+    def _confirm_pending(self):
+        uids = [uid for uid in self.index.unconfirmed() if uid not in self._confirming]
+        if not uids:
+            return
+        self._confirming.update(uids)
+        task = asyncio.create_task(self._confirm(uids))
+        self._confirm_tasks.add(task)
+        task.add_done_callback(self._confirm_tasks.discard)
+
+    async def _confirm(self, uids: List[str]):
+        try:
+            results = await self.stamping.wait_many(uids)
+            self.index.set_proofs([
+                (uid, {k: result[k] for k in ("proof", "root", "address", "data")})
+                for uid, result in zip(uids, results) if result.get("onchain")
+            ])
+        finally:
+            # Still unconfirmed uids are picked up again by the next scan
+            self._confirming.difference_update(uids)
+
+    async def drain(self):
+        """Wait for confirmations started by previous scans."""
+        while self._confirm_tasks:
+            await asyncio.gather(*list(self._confirm_tasks), return_exceptions=True)
+
+    async def run(self):
+        """Scan every interval seconds until cancelled."""
+        while True:
+            try:
+                await self.scan_once()
+            except Exception as e:
+                print(f"Scan of {self.root} failed: {e}")
+            await asyncio.sleep(self.interval)
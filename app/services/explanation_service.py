@@ -0,0 +1,102 @@
+import hashlib
+import json
+import re
+from typing import Any, Dict, Tuple
+
+from app.adapters.asi_client import ASIClient
+from app.config.settings import EXPLANATION_CACHE_SIZE, EXPLANATION_CACHE_TTL_SECONDS
+from app.services.cache import LRUCache
+
+# Fields that differ between otherwise identical verifications
+VOLATILE_KEYS = {"timestamp", "requestId", "request_id", "response_time", "download_url", "expires_at", "file_name"}
+_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def split_volatile(payload: Any, path: str = "") -> Tuple[Any, Dict[str, str]]:
+    """
+    Separate volatile fields from a verification payload
+
+    Args:
+        payload: Verification response (dicts/lists/scalars)
+        path: Dotted path of payload inside the root, used for recursion
+
+    Returns:
+        (payload with volatile values blanked, {dotted path: volatile value})
+    """
+    volatile = {}
+    if isinstance(payload, dict):
+        stable = {}
+        for key, value in payload.items():
+            child = f"{path}.{key}" if path else key
+            if key in VOLATILE_KEYS and not isinstance(value, (dict, list)):
+                volatile[child] = "" if value is None else str(value)
+                stable[key] = None
+            else:
+                stable[key], nested = split_volatile(value, child)
+                volatile.update(nested)
+        return stable, volatile
+    if isinstance(payload, list):
+        stable = []
+        for i, value in enumerate(payload):
+            item, nested = split_volatile(value, f"{path}[{i}]")
+            stable.append(item)
+            volatile.update(nested)
+        return stable, volatile
+    return payload, volatile
+
+
+class ExplanationService:
+    """
+    LLM explanations of verification results, memoized by result structure.
+
+    Explanations are cached under a digest of the verification payload with its
+    volatile fields (timestamps, request ids, download links) removed. The cached
+    text is a template in which those values are placeholders, filled with the
+    current request's values when it is served.
+    """
+
+    def __init__(self, asi: ASIClient, docs: str, maxsize: int = EXPLANATION_CACHE_SIZE, ttl: float = EXPLANATION_CACHE_TTL_SECONDS):
+        self.asi = asi
+        self.docs = docs
+        self.cache = LRUCache(maxsize, ttl=ttl)
+        self.uncacheable = 0
+
+    async def explain(self, verification: Dict[str, Any]) -> str:
+        stable, volatile = split_volatile(verification)
+        key = hashlib.sha3_256(json.dumps(stable, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+        template = self.cache.get(key)
+        if template is not None:
+            return self._fill(template, volatile)
+
+        explanation = await self.asi.explain_verification(self.docs, json.dumps(verification))
+        template = self._template(explanation, volatile, json.dumps(stable, default=str))
+        if template is None:
+            self.uncacheable += 1
+        else:
+            self.cache.set(key, template)
+        return explanation
+
+    @staticmethod
+    def _template(explanation: str, volatile: Dict[str, str], stable_text: str) -> str | None:
+        """Replace volatile values with {{path}} placeholders; None if they appear in a form we can't swap."""
+        template = explanation
+        # Longest values first so a value that contains another is replaced whole
+        for path, value in sorted(volatile.items(), key=lambda kv: -len(kv[1])):
+            if len(value) >= 4:
+                template = template.replace(value, "{{" + path + "}}")
+        # A volatile date the LLM reformatted (e.g. only the day) would go stale: don't cache it
+        for value in volatile.values():
+            for date in _DATE.findall(value):
+                if date in template and date not in stable_text:
+                    return None
+        return template
+
+    @staticmethod
+    def _fill(template: str, volatile: Dict[str, str]) -> str:
+        for path, value in volatile.items():
+            template = template.replace("{{" + path + "}}", value)
+        return template
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.cache.stats(), "uncacheable": self.uncacheable}
@@ -1,16 +1,244 @@
+import asyncio
 import hashlib
+import mmap
 import os
 import base64
-from typing import Optional, Dict, Any
+import binascii
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Dict, Any, Iterable, Iterator, List, Tuple
+
+from app.config.hashing import (
+    HASH_CHUNK_SIZE,
+    HASH_EXECUTOR,
+    HASH_EXTRA_DIGESTS,
+    HASH_INLINE_THRESHOLD,
+    HASH_MAX_CONCURRENT,
+    HASH_MMAP_THRESHOLD,
+    HASH_MODE,
+    HASH_WORKERS,
+    MERKLE_LEAF_SIZE,
+)
+from app.services.merkle import build_manifest, diff_manifests
+
+STAMP_ALGORITHM = "sha3_256"  # the digest that gets stamped; extra digests are informational
+
+_B64_ALPHABET = b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/"
+# Non-alphabet ASCII characters, discarded the same way base64.b64decode does
+_B64_DELETE = bytes(sorted(set(range(128)) - set(_B64_ALPHABET) - {ord("=")}))
+
+
+def iter_base64_chunks(contents: str, chunk_chars: int = HASH_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Decode base64 text piece by piece, yielding the same bytes as base64.b64decode(contents)
+
+    Everything before the first "=" is cleaned and decoded in whole 4-character
+    groups, chunk_chars at a time. The rest (padding and whatever follows it) goes
+    through base64.b64decode itself, so padding errors surface exactly as before.
+
+    Raises:
+        ValueError / binascii.Error: When base64.b64decode would raise
+    """
+    if not contents.isascii():
+        raise ValueError("string argument should contain only ASCII characters")
+
+    padding = contents.find("=")
+    body_end = len(contents) if padding == -1 else padding
+    carry = b""
+    for start in range(0, body_end, chunk_chars):
+        clean = carry + contents[start:min(start + chunk_chars, body_end)].encode("ascii").translate(None, _B64_DELETE)
+        usable = len(clean) - len(clean) % 4
+        carry = clean[usable:]
+        if usable:
+            yield binascii.a2b_base64(clean[:usable])
+
+    tail = carry + contents[body_end:].encode("ascii")
+    if tail:
+        decoded = base64.b64decode(tail)
+        if decoded:
+            yield decoded
+
+
+def iter_utf8_chunks(contents: str, chunk_chars: int = HASH_CHUNK_SIZE) -> Iterator[bytes]:
+    """UTF-8 encode text piece by piece (same bytes as contents.encode("utf-8"))."""
+    for start in range(0, len(contents), chunk_chars):
+        yield contents[start:start + chunk_chars].encode("utf-8")
+
+
+def iter_bytes_chunks(contents: bytes, chunk_size: int = HASH_CHUNK_SIZE) -> Iterator[memoryview]:
+    view = memoryview(contents)
+    for start in range(0, len(view), chunk_size):
+        yield view[start:start + chunk_size]
+
+
+def check_algorithms(algorithms: Iterable[str]) -> Tuple[str, ...]:
+    """
+    Validate extra digest names against hashlib
+
+    Raises:
+        ValueError: For an algorithm hashlib does not provide
+    """
+    names = tuple(dict.fromkeys(a.strip().lower() for a in algorithms if a.strip() and a.strip().lower() != STAMP_ALGORITHM))
+    unknown = [name for name in names if name not in hashlib.algorithms_available]
+    if unknown:
+        raise ValueError(f"Unsupported digest algorithm(s): {', '.join(unknown)}")
+    return names
+
+
+def digest_chunks(chunks: Iterable[bytes], algorithms: Iterable[str] = ()) -> Tuple[Dict[str, str], int]:
+    """
+    Feed every chunk into SHA3-256 and any extra algorithms in a single pass
+
+    Args:
+        chunks: Content pieces, read/decoded once
+        algorithms: Extra hashlib algorithm names, e.g. ("sha256", "blake2b")
+
+    Returns:
+        ({algorithm: hex digest} always including "sha3_256", number of bytes hashed)
+    """
+    hashers = {STAMP_ALGORITHM: hashlib.sha3_256()}
+    for name in algorithms:
+        hashers.setdefault(name, hashlib.new(name))
+    updates = [h.update for h in hashers.values()]
+    size = 0
+    for chunk in chunks:
+        for update in updates:
+            update(chunk)
+        size += len(chunk)
+    return {name: h.hexdigest() for name, h in hashers.items()}, size
+
+
+def hash_chunks(chunks: Iterable[bytes]) -> Tuple[str, int]:
+    """
+    Feed chunks into SHA3-256 as they arrive
+
+    Returns:
+        (SHA3-256 hash as hex string, number of bytes hashed)
+    """
+    digests, size = digest_chunks(chunks)
+    return digests[STAMP_ALGORITHM], size
+
+
+def digest_upload_contents(file_contents, chunk_size: int = HASH_CHUNK_SIZE, algorithms: Iterable[str] = ()) -> Tuple[Dict[str, str], int]:
+    """
+    Digest upload contents without materializing a decoded copy
+
+    Strings are treated as base64 (decoded in chunks straight into the hashes),
+    falling back to their UTF-8 bytes when they are not valid base64, exactly
+    like the previous b64decode-then-hash path. Bytes are hashed as-is.
+    Module-level so it can run in a process pool.
+
+    Returns:
+        ({algorithm: hex digest} always including "sha3_256", number of bytes hashed)
+    """
+    if not isinstance(file_contents, str):
+        return digest_chunks(iter_bytes_chunks(file_contents, chunk_size), algorithms)
+    try:
+        return digest_chunks(iter_base64_chunks(file_contents, chunk_size), algorithms)
+    except Exception as e:
+        print(f"Not base64 encoded, treating as UTF-8: {e}")
+        return digest_chunks(iter_utf8_chunks(file_contents, chunk_size), algorithms)
+
+
+def hash_upload_contents(file_contents, chunk_size: int = HASH_CHUNK_SIZE) -> Tuple[str, int]:
+    """
+    SHA3-256 of upload contents, see digest_upload_contents
+
+    Returns:
+        (SHA3-256 hash as hex string, number of bytes hashed)
+    """
+    digests, size = digest_upload_contents(file_contents, chunk_size)
+    return digests[STAMP_ALGORITHM], size
+
+
+def hash_file(path: str, chunk_size: int = HASH_CHUNK_SIZE, mmap_threshold: int = HASH_MMAP_THRESHOLD) -> Dict[str, Any]:
+    """
+    SHA3-256 of a file on disk
+
+    Files of at least mmap_threshold bytes are memory-mapped and hashed from the
+    mapping, which skips the copy into Python buffers; smaller files are read in
+    chunk_size pieces. Size and mtime come from the open file, so they describe
+    exactly the content that was hashed.
+
+    Returns:
+        {"path", "size", "mtime", "sha3_256"}
+
+    Raises:
+        OSError: When the file cannot be opened or read
+    """
+    with open(path, "rb") as f:
+        st = os.fstat(f.fileno())
+        sha3_256 = hashlib.sha3_256()
+        if st.st_size and st.st_size >= mmap_threshold:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                view = memoryview(mapped)
+                try:
+                    for start in range(0, len(view), chunk_size):
+                        sha3_256.update(view[start:start + chunk_size])
+                finally:
+                    view.release()
+        else:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                sha3_256.update(chunk)
+    return {"path": path, "size": st.st_size, "mtime": st.st_mtime, "sha3_256": sha3_256.hexdigest()}
+
+
+def hash_files(paths: List[str], chunk_size: int = HASH_CHUNK_SIZE, mmap_threshold: int = HASH_MMAP_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    hash_file over a batch of paths, one pool task per batch to keep IPC overhead low
+
+    Unreadable files are returned as {"path", "error"} instead of failing the batch.
+    """
+    results = []
+    for path in paths:
+        try:
+            results.append(hash_file(path, chunk_size, mmap_threshold))
+        except OSError as e:
+            results.append({"path": path, "error": str(e)})
+    return results
+
 
 # TODO: look through this, and see if we can improve it
 class HashingService:
     """Service for generating SHA3-256 hashes"""
 
-    # Constructor method, 
-    # Runs when instance is created, (empty, no setup needed here yet)
-    def __init__(self):
-        pass
+    def __init__(
+        self,
+        chunk_size: int = HASH_CHUNK_SIZE,
+        executor: str = HASH_EXECUTOR,
+        workers: int = HASH_WORKERS,
+        inline_threshold: int = HASH_INLINE_THRESHOLD,
+        max_concurrent: int = HASH_MAX_CONCURRENT,
+        extra_digests: Iterable[str] = HASH_EXTRA_DIGESTS,
+        mode: str = HASH_MODE,
+        leaf_size: int = MERKLE_LEAF_SIZE,
+    ):
+        if mode not in ("flat", "merkle"):
+            raise ValueError(f"Unknown hash mode {mode!r}, expected 'flat' or 'merkle'")
+        self.chunk_size = chunk_size
+        self.mode = mode
+        self.leaf_size = leaf_size
+        self._workers = workers
+        self.extra_digests = check_algorithms(extra_digests)
+        self.inline_threshold = inline_threshold
+        # Worker pool for large uploads; hashlib releases the GIL on big buffers so threads scale
+        if executor == "process":
+            self._executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hashing")
+        self._max_concurrent = max(1, max_concurrent)
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.counters = {
+            "inline": 0, "offloaded": 0, "waiting": 0, "running": 0,
+            "queue_wait_seconds_total": 0.0, "queue_wait_seconds_max": 0.0,
+            "hash_seconds_total": 0.0, "hash_seconds_max": 0.0,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self.counters)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
 
     def hash_content(self, content: bytes) -> str:
         """
@@ -22,23 +250,77 @@ class HashingService:
         Returns:
             SHA3-256 hash as hex string
         """
-        # Log the content being hashed
-        try:
-            # print(f"----> Hash content: {content}")
-            content_str = content.decode('utf-8')
-            # print(f"Content to hash: '{content_str}'")
-        except UnicodeDecodeError:
-            # print(f"Content to hash (raw bytes): {content}")
-            print(f"UnicodeDecodeError")
-
         print(f"Using SHA3-256 hashing algorithm")
-        sha3_256 = hashlib.sha3_256()
-        sha3_256.update(content)
-        
-        result = sha3_256.hexdigest()
+        result, _ = hash_chunks(iter_bytes_chunks(content, self.chunk_size))
         print(f"Generated hash: {result}")
         return result
 
+    def digest_content(self, content: bytes) -> Dict[str, str]:
+        """SHA3-256 plus the configured extra digests of content, in one pass."""
+        digests, _ = digest_chunks(iter_bytes_chunks(content, self.chunk_size), self.extra_digests)
+        return digests
+
+    def hash_upload_contents(self, file_contents) -> Tuple[str, int]:
+        return hash_upload_contents(file_contents, self.chunk_size)
+
+    def merkle_upload_contents(
+        self, file_contents, leaf_size: Optional[int] = None, extra_digests: Optional[Tuple[str, ...]] = None
+    ) -> Tuple[Dict[str, str], Dict[str, Any]]:
+        """
+        Merkle manifest of upload contents, leaves hashed in parallel on the worker pool
+
+        Decoding follows digest_upload_contents (base64, else UTF-8). Extra digests
+        are fed the same leaves in order, so they match flat mode.
+
+        Args:
+            file_contents: Upload contents as in digest_upload_contents
+            leaf_size: Leaf size in bytes, defaults to the service's
+            extra_digests: Extra algorithms, defaults to the service's
+
+        Returns:
+            ({algorithm: hex digest} with the root under the manifest's algorithm, manifest)
+        """
+        leaf_size = self.leaf_size if leaf_size is None else leaf_size
+        extra_digests = self.extra_digests if extra_digests is None else extra_digests
+
+        def manifest(chunks):
+            extra = {name: hashlib.new(name) for name in extra_digests}
+            result = build_manifest(chunks, leaf_size, self._executor, self._workers * 2, extra)
+            return {result["algorithm"]: result["root"], **{n: h.hexdigest() for n, h in extra.items()}}, result
+
+        if not isinstance(file_contents, str):
+            return manifest(iter_bytes_chunks(file_contents, self.chunk_size))
+        try:
+            return manifest(iter_base64_chunks(file_contents, self.chunk_size))
+        except Exception as e:
+            print(f"Not base64 encoded, treating as UTF-8: {e}")
+            return manifest(iter_utf8_chunks(file_contents, self.chunk_size))
+
+    def diff_upload(
+        self, manifest: Dict[str, Any], file_data: Dict[str, Any], current: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, int]]:
+        """
+        Compare an upload against a stored Merkle manifest
+
+        Args:
+            manifest: The stored manifest
+            file_data: The upload, with 'contents'
+            current: The upload's manifest if already built; reused when its leaf size matches
+
+        Returns:
+            Byte ranges of the leaves that differ (see merkle.diff_manifests), empty if unchanged
+        """
+        if current is None or current["leaf_size"] != manifest["leaf_size"]:
+            _, current = self.merkle_upload_contents(file_data["contents"], leaf_size=manifest["leaf_size"], extra_digests=())
+        return diff_manifests(manifest, current)
+
+    def _digest_upload(self, file_contents) -> Tuple[Dict[str, str], int, Optional[Dict[str, Any]]]:
+        if self.mode == "merkle":
+            digests, manifest = self.merkle_upload_contents(file_contents)
+            return digests, manifest["size"], manifest
+        digests, size = digest_upload_contents(file_contents, self.chunk_size, self.extra_digests)
+        return digests, size, None
+
     def hash_uploaded_file(self, file_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Hash an uploaded file from file data
@@ -47,98 +329,102 @@ class HashingService:
             file_data: Dictionary containing file data with 'contents' and 'filename' keys
             
         Returns:
-            Dictionary containing hash result with file_id, filename, hash, and hashed_at
+            Dictionary containing hash result with file_id, filename, hash (the value to stamp),
+            hash_mode, digests (stamped value plus the configured extra algorithms), size_bytes
+            and hashed_at. In merkle mode hash is the Merkle root and the leaf manifest is
+            included under "manifest".
         """
-        from datetime import datetime, timezone
-        from uuid import uuid4
-        
         file_contents = file_data["contents"]
         filename = file_data["filename"]
-        
-        # Log the raw file contents to see what we're getting
-        # print(f"Raw file contents type: {type(file_contents)}")
-        # print(f"Raw file contents: '{file_contents}'")
-        
-        # Convert to bytes if it's a string
-        if isinstance(file_contents, str):
-            # Check if it's base64 encoded
+
+        started = time.perf_counter()
+        digests, size, manifest = self._digest_upload(file_contents)
+        elapsed = time.perf_counter() - started
+        print(f"Hashed {filename}: {size / 1e6:.1f} MB in {elapsed:.3f}s ({size / 1e6 / max(elapsed, 1e-9):.1f} MB/s)")
+        return self._hash_record(filename, digests, size, manifest)
+
+    async def hash_uploaded_file_async(self, file_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Same as hash_uploaded_file, without blocking the event loop on large uploads
+
+        Uploads smaller than inline_threshold are hashed inline. Larger ones wait
+        for one of max_concurrent slots and are hashed on the worker pool.
+        """
+        file_contents = file_data["contents"]
+        if len(file_contents) < self.inline_threshold:
+            self.counters["inline"] += 1
+            return self.hash_uploaded_file(file_data)
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrent)
+
+        self.counters["waiting"] += 1
+        queued = time.perf_counter()
+        async with self._semaphore:
+            self.counters["waiting"] -= 1
+            self.counters["running"] += 1
+            started = time.perf_counter()
+            self._observe("queue_wait", started - queued)
             try:
-                # Try to decode base64 first
-                decoded_content = base64.b64decode(file_contents)
-                # print(f"Base64 decoded content: {decoded_content}")
-                file_contents = decoded_content
-            except Exception as e:
-                print(f"Not base64 encoded, treating as UTF-8: {e}")
-                file_contents = file_contents.encode("utf-8")
-        
-        hash_value = self.hash_content(file_contents)
+                loop = asyncio.get_running_loop()
+                if self.mode == "merkle":
+                    # Decoding runs on the default executor and farms the leaves out to ours
+                    digests, size, manifest = await loop.run_in_executor(None, self._digest_upload, file_contents)
+                else:
+                    digests, size = await loop.run_in_executor(
+                        self._executor, digest_upload_contents, file_contents, self.chunk_size, self.extra_digests
+                    )
+                    manifest = None
+            finally:
+                self.counters["running"] -= 1
+            elapsed = time.perf_counter() - started
+            self._observe("hash", elapsed)
+
+        self.counters["offloaded"] += 1
+        filename = file_data["filename"]
+        print(f"Hashed {filename} on worker pool: {size / 1e6:.1f} MB in {elapsed:.3f}s (waited {started - queued:.3f}s)")
+        return self._hash_record(filename, digests, size, manifest)
+
+    async def hash_local_files(self, paths: List[str], batch_files: int = 64) -> List[Dict[str, Any]]:
+        """
+        hash_file over local paths on the worker pool, in order
+
+        Paths go out in batches of batch_files with at most two batches per worker
+        in flight. Unreadable files come back as {"path", "error"}.
+        """
+        loop = asyncio.get_running_loop()
+        batches = [paths[i:i + batch_files] for i in range(0, len(paths), batch_files)]
+        window = max(1, self._workers) * 2
+        results = []
+        for start in range(0, len(batches), window):
+            done = await asyncio.gather(*(
+                loop.run_in_executor(self._executor, hash_files, batch, self.chunk_size)
+                for batch in batches[start:start + window]
+            ))
+            for batch_result in done:
+                results.extend(batch_result)
+        return results
+
+    def _observe(self, name: str, seconds: float):
+        self.counters[f"{name}_seconds_total"] += seconds
+        self.counters[f"{name}_seconds_max"] = max(self.counters[f"{name}_seconds_max"], seconds)
+
+    def _hash_record(self, filename: str, digests: Dict[str, str], size: int, manifest: Dict[str, Any] = None) -> Dict[str, Any]:
+        from datetime import datetime, timezone
+        from uuid import uuid4
 
         # Create hash record
         file_id = f"file_{uuid4().hex[:8]}"
         hash_record = {
             "file_id": file_id,
             "filename": filename,
-            "hash": hash_value,
+            "hash": manifest["root"] if manifest else digests[STAMP_ALGORITHM],
+            "hash_mode": "merkle" if manifest else "flat",
+            "digests": digests,
+            "size_bytes": size,
             "hashed_at": datetime.now(timezone.utc).isoformat()
         }
+        if manifest:
+            hash_record["manifest"] = manifest
         
         return hash_record
-
-    # async def hash_file(self, file_path: str) -> Optional[str]:
-    #     """
-    #     Generate SHA3-256 hash of a file
-        
-    #     Args:
-    #         file_path: Path to the file to hash
-            
-    #     Returns:
-    #         SHA3-256 hash as hex string, or None if file doesn't exist
-    #     """
-    #     try:
-    #         print(f"----> Hash file: {file_path}")
-    #         # Check if the file actually exists
-    #         if not os.path.exists(file_path):
-    #             print(f"File does not exist: {file_path}")
-    #             return None
-                
-    #         # Check if it's a file (not a directory)
-    #         if not os.path.isfile(file_path):
-    #             print(f"Path is not a file: {file_path}")
-    #             return None
-                
-    #         # Check if we have read permissions
-    #         if not os.access(file_path, os.R_OK):
-    #             print(f"No read permission for file: {file_path}")
-    #             return None
-            
-    #         # Read and log file content (for logs only, ok to remove)
-    #         with open(file_path, "r", encoding='utf-8') as f:
-    #             file_content = f.read()
-    #             print(f"File content: '{file_content}'")
-            
-    #         print(f"Using SHA3-256 hashing algorithm")
-                
-    #         # Create SHA3-256 hash object
-    #         sha3_256 = hashlib.sha3_256()
-
-    #         # Open file and read in chunks of 4096 bytes
-    #         with open(file_path, "rb") as f:
-    #             for chunk in iter(lambda: f.read(4096), b""):
-    #                 sha3_256.update(chunk)
-
-    #         # Return the final hash value as a hexadecimal string
-    #         result = sha3_256.hexdigest()
-    #         print(f"Generated hash: {result}")
-    #         return result
-        
-    #     except FileNotFoundError as e:
-    #         print(f"File not found: {file_path} - {e}")
-    #         return None
-    #     except PermissionError as e:
-    #         print(f"Permission denied for file: {file_path} - {e}")
-    #         return None
-    #     except Exception as e:
-    #         # If anything goes wrong (bad path, permission error, etc.),
-    #         # print the error and return None
-    #         print(f"Error hashing file {file_path}: {e}")
-    #         return None
\ No newline at end of file
@@ -1,12 +1,65 @@
+import base64
+import binascii
 import json
+import re
+from typing import Any, Dict, List, Optional
 from app.adapters.asi_client import ASIClient
 from app.schemas.chat import IntentResult
 
+# Rule-based fast path, only used when the message is unambiguous
+_HASH_RE = re.compile(r"(?<![0-9a-fA-Fx])(?:0x)?([0-9a-fA-F]{64})(?![0-9a-fA-F])")
+_STAMP_RE = re.compile(r"stamp|notari[sz]e", re.IGNORECASE)
+_UNSURE_RE = re.compile(r"verif|validat|check|status|explain|\bhow\b|\bwhat\b|\bwhy\b|\?", re.IGNORECASE)
+_PROOF_KEYS = ("data", "root", "address", "proof")
+_PEEK_CHARS = 4096  # base64 chars decoded to sniff an uploaded JSON file
+
+
 class IntentService:
     def __init__(self, asi: ASIClient):
         self.asi = asi
+        self.counters = {"fast_path": 0, "llm": 0}
+
+    def stats(self) -> dict:
+        return dict(self.counters)
+
+    async def detect(self, text: str, files: Optional[List[Dict[str, Any]]] = None) -> IntentResult:
+        fast = self.classify(text, files)
+        if fast:
+            self.counters["fast_path"] += 1
+            return fast
+
+        self.counters["llm"] += 1
+        # Enhance the text with file information for better intent detection
+        if files:
+            text = f"{text} [File uploaded: {files[0]['filename']}]"
+        return await self.detect_llm(text)
+
+    def classify(self, text: str, files: Optional[List[Dict[str, Any]]] = None) -> IntentResult | None:
+        """
+        Deterministic pre-classifier for requests that don't need the LLM.
+
+        Recognises an uploaded JSON proof file, a stamp request for an uploaded
+        file, a pasted JSON proof object, and a single SHA3-256 hash next to a
+        stamp verb. Returns None when unsure, so the caller falls back to the LLM.
+        """
+        if files:
+            if _is_proof_file(files[0]):
+                return IntentResult(kind="VERIFY_PROOF_FILE", payload={"uploaded_file": True}, raw_response="VERIFY_PROOF_FILE:")
+            if _STAMP_RE.search(text) and not _UNSURE_RE.search(text):
+                return IntentResult(kind="STAMP_FILE", payload={"uploaded_file": True}, raw_response="STAMP_FILE:")
+            return None
+
+        proof = _find_proof_object(text)
+        if proof is not None:
+            return IntentResult(kind="VERIFY_PROOF", payload=proof, raw_response=f"VERIFY_PROOF:{json.dumps(proof)}")
 
-    async def detect(self, text: str) -> IntentResult:
+        hashes = {h.lower() for h in _HASH_RE.findall(text)}
+        if len(hashes) == 1 and _STAMP_RE.search(text) and not _UNSURE_RE.search(text):
+            hash_value = hashes.pop()
+            return IntentResult(kind="STAMP_HASH", payload={"hash": hash_value}, raw_response=f"STAMP_HASH:{hash_value}")
+        return None
+
+    async def detect_llm(self, text: str) -> IntentResult:
         content = await self.asi.classify_intent(text)
         kind = "GENERAL"
         payload = {}
@@ -22,7 +75,7 @@ class IntentService:
         if content.startswith("STAMP_FILE:"):
             kind = "STAMP_FILE"
             payload = {"uploaded_file": True}
-   
+
         elif content.startswith("STAMP_HASH:"):
             kind = "STAMP_HASH"
             payload = {"hash": content.split("STAMP_HASH:", 1)[1].strip()}
@@ -39,5 +92,41 @@ class IntentService:
             kind = "VERIFY_PROOF_FILE"
             print(f"Step 2: VERIFY_PROOF_FILE intent detected")
             payload = {"uploaded_file": True}
-      
+
         return IntentResult(kind=kind, payload=payload, raw_response=content)
+
+
+def _find_proof_object(text: str) -> Dict[str, Any] | None:
+    """First JSON object in text that has data, root, address and proof keys."""
+    decoder = json.JSONDecoder()
+    start = text.find("{")
+    while start != -1:
+        try:
+            obj, _ = decoder.raw_decode(text, start)
+        except ValueError:
+            obj = None
+        if isinstance(obj, dict) and all(k in obj for k in _PROOF_KEYS):
+            return obj
+        start = text.find("{", start + 1)
+    return None
+
+
+def _is_proof_file(file: Dict[str, Any]) -> bool:
+    """Cheap sniff of an upload: a JSON array whose start mentions all proof keys."""
+    if file.get("mime_type") != "application/json":
+        return False
+    contents = file.get("contents", "")
+    if isinstance(contents, str):
+        heads = [contents[:_PEEK_CHARS]]  # plain JSON text
+        try:
+            peek = heads[0][:len(heads[0]) - len(heads[0]) % 4]
+            heads.append(base64.b64decode(peek).decode("utf-8", errors="ignore"))
+        except (binascii.Error, ValueError):
+            pass
+    else:
+        heads = [bytes(contents[:_PEEK_CHARS]).decode("utf-8", errors="ignore")]
+    for head in heads:
+        head = head.lstrip()
+        if head.startswith("[") and all(f'"{k}"' in head for k in _PROOF_KEYS):
+            return True
+    return False
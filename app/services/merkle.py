@@ -0,0 +1,120 @@
+import hashlib
+from collections import deque
+from concurrent.futures import Executor
+from typing import Any, Dict, Iterable, Iterator, List
+
+# Domain separation so a leaf can never be passed off as an inner node
+_LEAF_PREFIX = b"\x00"
+_NODE_PREFIX = b"\x01"
+
+
+def leaf_hash(chunk: bytes) -> bytes:
+    """SHA3-256 of one leaf. Module-level so it can run in a process pool."""
+    return hashlib.sha3_256(_LEAF_PREFIX + bytes(chunk)).digest()
+
+
+def node_hash(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha3_256(_NODE_PREFIX + left + right).digest()
+
+
+def merkle_root(leaves: List[bytes]) -> bytes:
+    """
+    Root over leaf hashes, pairing left to right; an odd node is promoted unchanged
+
+    An empty input has the root of a single empty leaf.
+    """
+    if not leaves:
+        return leaf_hash(b"")
+    level = list(leaves)
+    while len(level) > 1:
+        paired = [node_hash(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0]
+
+
+def iter_leaves(chunks: Iterable[bytes], leaf_size: int) -> Iterator[bytes]:
+    """Regroup arbitrary-sized chunks into leaves of exactly leaf_size bytes (the last may be shorter)."""
+    buffer = bytearray()
+    for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= leaf_size:
+            yield bytes(buffer[:leaf_size])
+            del buffer[:leaf_size]
+    if buffer:
+        yield bytes(buffer)
+
+
+def hash_leaves(leaves: Iterable[bytes], executor: Executor, window: int) -> Iterator[bytes]:
+    """
+    Hash leaves on executor, in order, with at most window leaves in flight
+
+    The window bounds memory to window * leaf_size no matter how large the input is.
+    """
+    pending = deque()
+    for leaf in leaves:
+        pending.append(executor.submit(leaf_hash, leaf))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def build_manifest(chunks: Iterable[bytes], leaf_size: int, executor: Executor, window: int, extra: Dict[str, Any] = None) -> Dict[str, Any]:
+    """
+    Split content into fixed-size leaves, hash them in parallel and compute the root
+
+    Args:
+        chunks: Content pieces of any size, read once
+        leaf_size: Bytes per leaf
+        executor: Pool the leaves are hashed on
+        window: Maximum leaves in flight
+        extra: Optional {name: hashlib object} updated with every leaf in order (extra digests)
+
+    Returns:
+        Manifest {"algorithm", "leaf_size", "size", "root", "leaves"} with hex hashes
+    """
+    size = 0
+
+    def counted(leaves):
+        nonlocal size
+        for leaf in leaves:
+            size += len(leaf)
+            for hasher in (extra or {}).values():
+                hasher.update(leaf)
+            yield leaf
+
+    leaves = list(hash_leaves(counted(iter_leaves(chunks, leaf_size)), executor, window))
+    return {
+        "algorithm": "sha3_256-merkle",
+        "leaf_size": leaf_size,
+        "size": size,
+        "root": merkle_root(leaves).hex(),
+        "leaves": [leaf.hex() for leaf in leaves],
+    }
+
+
+def diff_manifests(old: Dict[str, Any], new: Dict[str, Any]) -> List[Dict[str, int]]:
+    """
+    Byte ranges whose leaves differ between two manifests of the same leaf size
+
+    Returns:
+        [{"leaf": index, "start": first byte, "end": end byte (exclusive)}], empty when identical.
+        Leaves present in only one manifest are reported against the larger size.
+
+    Raises:
+        ValueError: When the manifests were built with different leaf sizes
+    """
+    if old["leaf_size"] != new["leaf_size"]:
+        raise ValueError("Manifests use different leaf sizes and cannot be compared")
+    leaf_size = old["leaf_size"]
+    total = max(old["size"], new["size"])
+    old_leaves, new_leaves = old["leaves"], new["leaves"]
+    changed = []
+    for i in range(max(len(old_leaves), len(new_leaves))):
+        a = old_leaves[i] if i < len(old_leaves) else None
+        b = new_leaves[i] if i < len(new_leaves) else None
+        if a != b:
+            changed.append({"leaf": i, "start": i * leaf_size, "end": min((i + 1) * leaf_size, total)})
+    return changed
@@ -0,0 +1,41 @@
+from typing import Any, Callable, Dict
+
+# name -> zero-argument callable returning a flat dict of counters/gauges
+_sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def register(name: str, source: Callable[[], Dict[str, Any]]):
+    """Expose a component's counters under name in the /metrics snapshot."""
+    _sources[name] = source
+
+
+def snapshot() -> Dict[str, Dict[str, Any]]:
+    metrics = {}
+    for name, source in _sources.items():
+        try:
+            metrics[name] = source()
+        except Exception as e:
+            metrics[name] = {"error": str(e)}
+    return metrics
+
+
+class LatencyStats:
+    """Count, total, mean and max of observed durations in seconds."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "seconds_total": round(self.total, 6),
+            "seconds_avg": round(self.total / self.count, 6) if self.count else 0.0,
+            "seconds_max": round(self.max, 6),
+        }
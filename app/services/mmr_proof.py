@@ -0,0 +1,134 @@
+"""
+Structural checks of Integritas (Minima MMR) proofs, so malformed proofs are
+rejected before an upstream verify call. Tampered but well-formed proofs still
+go upstream: only the verify endpoint can tell them apart.
+
+A proof is the hex serialization of a Minima MMRProof:
+
+    MiniNumber blocktime
+    MiniNumber chunk count
+    per chunk: MiniByte is_left, MiniData hash, MiniNumber value
+
+MiniData is a 4-byte big-endian length followed by the bytes; MiniNumber is a
+signed scale byte, a length byte and the unscaled value as big-endian two's
+complement (Java BigDecimal).
+
+Only the structure is checked. The root is not recomputed: the leaf encoding
+Integritas uses is not reproduced by hashing MiniData(data) (the documented
+examples give other roots), so a local root check would reject valid proofs.
+"""
+import re
+import struct
+from typing import List, NamedTuple
+
+_HEX = re.compile(r"(?:0x)?([0-9a-fA-F]*)")
+
+
+class ProofRejected(ValueError):
+    """A proof that cannot be valid, found without calling upstream."""
+
+
+class Number(NamedTuple):
+    unscaled: int
+    scale: int
+
+
+ZERO = Number(0, 0)
+
+
+class Chunk(NamedTuple):
+    is_left: bool
+    hash: bytes
+    value: Number
+
+
+class Proof(NamedTuple):
+    blocktime: Number
+    chunks: List[Chunk]
+
+
+def hex_bytes(value: str, field: str) -> bytes:
+    """Bytes of a hex string with optional 0x prefix; ProofRejected if it isn't one."""
+    match = _HEX.fullmatch(value.strip()) if isinstance(value, str) else None
+    if not match or len(match.group(1)) % 2:
+        raise ProofRejected(f"'{field}' is not a hex string")
+    return bytes.fromhex(match.group(1))
+
+
+class _Reader:
+    def __init__(self, raw: bytes):
+        self.raw = raw
+        self.pos = 0
+
+    def take(self, n: int) -> bytes:
+        if self.pos + n > len(self.raw):
+            raise ProofRejected("'proof' is truncated")
+        chunk = self.raw[self.pos:self.pos + n]
+        self.pos += n
+        return chunk
+
+    def mini_data(self) -> bytes:
+        (length,) = struct.unpack(">i", self.take(4))
+        if length < 0:
+            raise ProofRejected("'proof' has a negative data length")
+        return self.take(length)
+
+    def mini_number(self) -> Number:
+        scale = struct.unpack(">b", self.take(1))[0]
+        length = self.take(1)[0]
+        if length == 0:
+            raise ProofRejected("'proof' has an empty number")
+        return Number(int.from_bytes(self.take(length), "big", signed=True), scale)
+
+
+def parse_proof(proof_hex: str) -> Proof:
+    """
+    Deserialize a proof
+
+    Raises:
+        ProofRejected: Not hex, truncated, trailing bytes or an impossible chunk count
+    """
+    reader = _Reader(hex_bytes(proof_hex, "proof"))
+    blocktime = reader.mini_number()
+    count = reader.mini_number()
+    if count.scale != 0 or count.unscaled < 0:
+        raise ProofRejected("'proof' has an invalid chunk count")
+    # Each chunk takes at least 1 + 4 + 3 bytes, which bounds a sane count
+    if count.unscaled * 8 > len(reader.raw) - reader.pos:
+        raise ProofRejected("'proof' is truncated")
+    chunks = []
+    for _ in range(count.unscaled):
+        flag = reader.take(1)[0]
+        if flag not in (0, 1):
+            raise ProofRejected("'proof' has an invalid chunk side")
+        chunks.append(Chunk(flag == 1, reader.mini_data(), reader.mini_number()))
+    if reader.pos != len(reader.raw):
+        raise ProofRejected("'proof' has trailing bytes")
+    return Proof(blocktime, chunks)
+
+
+def _mini_data(raw: bytes) -> bytes:
+    return struct.pack(">i", len(raw)) + raw
+
+
+def _mini_number(number: Number) -> bytes:
+    unscaled = number.unscaled.to_bytes((number.unscaled.bit_length() + 8) // 8, "big", signed=True)
+    return struct.pack(">bB", number.scale, len(unscaled)) + unscaled
+
+
+def check_proof_structure(proof: str, root: str, address: str, data: str) -> Proof:
+    """
+    Reject proofs that are malformed, without any network call
+
+    Every field must be hex and the proof must deserialize completely. The root
+    is not recomputed, so a well-formed proof for other data passes.
+
+    Returns:
+        The parsed proof
+
+    Raises:
+        ProofRejected: With a message naming the problem
+    """
+    for field, value in (("root", root), ("address", address), ("data", data)):
+        hex_bytes(value, field)
+    return parse_proof(proof)
@@ -0,0 +1,91 @@
+import random
+from typing import Dict, Type
+
+from app.config.settings import (
+    POLL_BASE_DELAY_SECONDS, POLL_DEADLINE_SECONDS, POLL_INITIAL_DELAY_SECONDS,
+    POLL_JITTER, POLL_MAX_DELAY_SECONDS, POLL_SCHEDULE,
+)
+
+
+class PollSchedule:
+    """
+    When to check a uid for on-chain confirmation.
+
+    The first check waits initial_delay (confirmation is impossible right after
+    stamping), later checks are spaced by step() capped at max_delay, and every
+    delay is spread by +/- jitter so pollers don't fire in lockstep. Polling stops
+    once deadline seconds have passed since the uid was registered.
+
+    This base class polls at a fixed base_delay.
+    """
+
+    def __init__(
+        self,
+        initial_delay: float = POLL_INITIAL_DELAY_SECONDS,
+        base_delay: float = POLL_BASE_DELAY_SECONDS,
+        max_delay: float = POLL_MAX_DELAY_SECONDS,
+        jitter: float = POLL_JITTER,
+        deadline: float = POLL_DEADLINE_SECONDS,
+    ):
+        self.initial_delay = initial_delay
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = min(max(jitter, 0.0), 1.0)
+        self.deadline = deadline
+
+    def step(self, poll: int) -> float:
+        """Un-jittered delay after the given poll (1 = after the first poll)."""
+        return self.base_delay
+
+    def next_delay(self, poll: int) -> float:
+        """
+        Seconds to wait before the next poll
+
+        Args:
+            poll: Number of polls already made for this uid
+
+        Returns:
+            Delay in seconds, jittered
+        """
+        delay = self.initial_delay if poll == 0 else min(self.step(poll), self.max_delay)
+        if self.jitter:
+            delay *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return max(0.0, delay)
+
+
+class ExponentialSchedule(PollSchedule):
+    """base_delay, 2x, 4x, ... capped at max_delay."""
+
+    def step(self, poll: int) -> float:
+        return self.base_delay * (2 ** min(poll - 1, 32))
+
+
+class FibonacciSchedule(PollSchedule):
+    """base_delay x 1, 1, 2, 3, 5, ... capped at max_delay. Gentler than exponential."""
+
+    def step(self, poll: int) -> float:
+        a, b = 1, 1
+        for _ in range(min(poll - 1, 64)):
+            a, b = b, a + b
+        return self.base_delay * a
+
+
+SCHEDULES: Dict[str, Type[PollSchedule]] = {
+    "fixed": PollSchedule,
+    "exponential": ExponentialSchedule,
+    "fibonacci": FibonacciSchedule,
+}
+
+
+def build_poll_schedule(kind: str = POLL_SCHEDULE, **overrides) -> PollSchedule:
+    """Build a schedule by name ("fixed", "exponential" or "fibonacci"), settings as defaults."""
+    try:
+        schedule_cls = SCHEDULES[kind.lower()]
+    except KeyError:
+        raise ValueError(f"Unknown poll schedule '{kind}', expected one of {', '.join(SCHEDULES)}")
+    return schedule_cls(**overrides)
+
+
+def immediate_schedule() -> PollSchedule:
+    """Check once on the next poller tick and give up right after: a current-status lookup."""
+    return PollSchedule(initial_delay=0, jitter=0, deadline=0)
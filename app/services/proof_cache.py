@@ -0,0 +1,78 @@
+import json
+import sqlite3
+from typing import Any, Dict, Optional
+
+from app.config.settings import PROOF_CACHE_SIZE, PROOF_STORE_PATH
+from app.services.cache import LRUCache
+
+
+def normalize_uid(uid: str) -> str:
+    """Canonical form of a uid: trimmed and uppercase, as upstream returns them."""
+    return uid.strip().upper()
+
+
+class ProofCache:
+    """
+    Proofs of confirmed uids, which never change once a uid is on-chain.
+
+    Lookups go to a size-bounded in-memory LRU first and fall back to an SQLite
+    store on disk, so memory stays bounded while every proof ever confirmed can
+    still be answered without calling upstream.
+    """
+
+    def __init__(self, path: str = PROOF_STORE_PATH, memory_size: int = PROOF_CACHE_SIZE):
+        self.memory = LRUCache(memory_size)
+        self._db = sqlite3.connect(path, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS proofs (uid TEXT PRIMARY KEY, proof TEXT NOT NULL)")
+        self.disk_hits = 0
+        self.misses = 0
+
+    def get(self, uid: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up the on-chain result of a confirmed uid
+
+        Args:
+            uid: The uid to look up
+
+        Returns:
+            The same dict the status poller resolves with, or None if not cached
+        """
+        key = normalize_uid(uid)
+        proof = self.memory.get(key)
+        if proof is not None:
+            return dict(proof)
+
+        row = self._db.execute("SELECT proof FROM proofs WHERE uid = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.disk_hits += 1
+        proof = json.loads(row[0])
+        self.memory.set(key, proof)
+        return dict(proof)
+
+    def put(self, uid: str, proof: Dict[str, Any]):
+        """Store the result for a uid. Only on-chain results are final, anything else is ignored."""
+        if not proof.get("onchain"):
+            return
+        key = normalize_uid(uid)
+        self.memory.set(key, dict(proof))
+        self._db.execute(
+            "INSERT OR REPLACE INTO proofs (uid, proof) VALUES (?, ?)", (key, json.dumps(proof))
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        memory = self.memory.stats()
+        return {
+            "memory_size": memory["size"],
+            "memory_maxsize": memory["maxsize"],
+            "memory_hits": memory["hits"],
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": memory["evictions"],
+        }
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,148 @@
+import codecs
+import json
+from typing import Any, Dict, Iterator
+
+from app.config.hashing import HASH_CHUNK_SIZE
+from app.services.hashing_service import iter_base64_chunks
+
+REQUIRED_PROPS = ("address", "data", "proof", "root")
+_WHITESPACE = " \t\n\r"
+_NUMBER_CHARS = frozenset("0123456789.eE+-")
+
+
+class ProofFileError(ValueError):
+    """The upload is not a JSON array of proof entries."""
+
+
+def iter_text(contents, chunk_size: int = HASH_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Decoded text of an uploaded JSON file, piece by piece
+
+    Uploads arrive base64 encoded; plain JSON text (starting with "[" or "{",
+    neither of which base64 can start with) is passed through as-is.
+    """
+    if isinstance(contents, (bytes, bytearray, memoryview)):
+        contents = bytes(contents).decode("utf-8")
+    head = contents[:64].lstrip()
+    if head.startswith(("[", "{")):
+        for start in range(0, len(contents), chunk_size):
+            yield contents[start:start + chunk_size]
+        return
+
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    try:
+        for chunk in iter_base64_chunks(contents, chunk_size):
+            yield decoder.decode(chunk)
+        yield decoder.decode(b"", final=True)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ProofFileError(f"File is neither JSON nor base64 encoded JSON: {e}") from e
+
+
+def _runs_to_end(buffer: str, start: int) -> bool:
+    """True when only number characters follow start in buffer."""
+    for i in range(start, len(buffer)):
+        if buffer[i] not in _NUMBER_CHARS:
+            return False
+    return True
+
+
+def iter_json_array(chunks: Iterator[str]) -> Iterator[Any]:
+    """
+    Yield the elements of a top-level JSON array as they are parsed
+
+    Only the unparsed remainder of the text is buffered, so memory stays bounded
+    by the largest element rather than the whole document.
+
+    Raises:
+        ProofFileError: When the text is not a JSON array
+    """
+    decoder = json.JSONDecoder()
+    chunks = iter(chunks)
+    buffer = ""
+    pos = 0
+    eof = False
+
+    def fill() -> bool:
+        nonlocal buffer, pos, eof
+        if eof:
+            return False
+        try:
+            buffer = buffer[pos:] + next(chunks)
+        except StopIteration:
+            eof = True
+            return False
+        pos = 0
+        return True
+
+    def skip_whitespace():
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+                pos += 1
+            if pos < len(buffer) or not fill():
+                return
+
+    skip_whitespace()
+    if buffer[pos:pos + 1] != "[":
+        raise ProofFileError("JSON is not a list")
+    pos += 1
+    skip_whitespace()
+    if buffer[pos:pos + 1] == "]":
+        return
+
+    while True:
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                # A number that runs up to the end of the buffer (e.g. "25." or "1e") may
+                # continue in the next chunk; only a delimiter after it proves it complete
+                if (
+                    isinstance(value, (int, float)) and not isinstance(value, bool)
+                    and _runs_to_end(buffer, end)
+                    and not eof and fill()
+                ):
+                    continue
+                break
+            except json.JSONDecodeError as e:
+                if not fill():
+                    raise ProofFileError(f"Invalid JSON: {e}") from e
+        pos = end
+        yield value
+        skip_whitespace()
+        separator = buffer[pos:pos + 1]
+        pos += 1
+        if separator == "]":
+            return
+        if separator != ",":
+            raise ProofFileError("Invalid JSON: expected ',' or ']' in the proof list")
+        skip_whitespace()
+
+
+def iter_proof_entries(file_data: Dict[str, Any], chunk_size: int = HASH_CHUNK_SIZE) -> Iterator[Dict[str, Any]]:
+    """
+    Proof entries of an uploaded proof file, decoded and parsed in one streaming pass
+
+    The file is validated while it is read: it must be application/json holding a
+    non-empty array whose first entry has address, data, proof and root.
+
+    Raises:
+        ProofFileError: As soon as the file turns out not to be a proof file
+    """
+    if file_data.get("mime_type") != "application/json":
+        raise ProofFileError(f"File is not JSON (mime_type: {file_data.get('mime_type')})")
+
+    count = 0
+    for entry in iter_json_array(iter_text(file_data.get("contents", ""), chunk_size)):
+        if count == 0:
+            if not isinstance(entry, dict):
+                raise ProofFileError("Proof entries must be JSON objects")
+            missing = [p for p in REQUIRED_PROPS if p not in entry]
+            if missing:
+                raise ProofFileError(f"Missing required property: {', '.join(missing)}")
+        elif not isinstance(entry, dict):
+            # Later malformed entries are reported per entry by the verifier
+            entry = {}
+        count += 1
+        yield entry
+    if count == 0:
+        raise ProofFileError("JSON list is empty")
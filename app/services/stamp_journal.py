@@ -0,0 +1,68 @@
+import sqlite3
+import time
+from typing import Any, Dict, List
+
+from app.config.settings import STAMP_JOURNAL_PATH
+
+
+class StampJournal:
+    """
+    Durable record of stamps still waiting for on-chain confirmation.
+
+    A row is written as soon as a uid is known and someone is owed a confirmation
+    (chat user or RPC caller), and deleted once that confirmation was delivered.
+    Whatever is left after a restart is replayed into the status poller, so no
+    stamp call is repeated and no confirmation is lost.
+    """
+
+    def __init__(self, path: str = STAMP_JOURNAL_PATH):
+        self.path = path
+        self._db = sqlite3.connect(path, isolation_level=None)  # autocommit, one write per statement
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pending_stamps (
+                uid TEXT NOT NULL,
+                sender TEXT NOT NULL,
+                request_id TEXT NOT NULL,
+                channel TEXT NOT NULL,          -- "chat" | "rpc" | "subscribe"
+                hash TEXT,
+                submitted_at REAL NOT NULL,
+                PRIMARY KEY (uid, sender, request_id)
+            )
+            """
+        )
+
+    def record(self, uid: str, sender: str, request_id: str, channel: str, hash_value: str = None):
+        """
+        Remember that sender is owed a confirmation for uid
+
+        Args:
+            uid: The uid returned by the stamp endpoint
+            sender: Agent address to deliver the confirmation to
+            request_id: Request id the confirmation answers
+            channel: "chat" (final_hash_confirmation), "rpc" or "subscribe" (UidResponse)
+            hash_value: The stamped hash, if known
+        """
+        self._db.execute(
+            "INSERT OR IGNORE INTO pending_stamps (uid, sender, request_id, channel, hash, submitted_at) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (uid, sender, request_id, channel, hash_value, time.time()),
+        )
+
+    def complete(self, uid: str, sender: str, request_id: str):
+        """Forget an entry once its confirmation has been delivered (or given up on)."""
+        self._db.execute(
+            "DELETE FROM pending_stamps WHERE uid = ? AND sender = ? AND request_id = ?",
+            (uid, sender, request_id),
+        )
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """All entries still owed a confirmation, oldest first."""
+        rows = self._db.execute("SELECT * FROM pending_stamps ORDER BY submitted_at").fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self):
+        self._db.close()
@@ -1,40 +1,129 @@
 import asyncio
 from datetime import datetime, timezone
+from uuid import uuid4
 from app.adapters.integritas_client import IntegritasClient
-from app.config.settings import POLL_DELAY_SECONDS, POLL_MAX_ATTEMPTS
+from app.config.settings import BATCH_MAX_CONCURRENCY, STAMP_DEDUP_TTL_SECONDS
+from app.services.poll_schedule import PollSchedule, immediate_schedule
+from app.services.stamp_journal import StampJournal
+from app.services.status_poller import StatusPoller
+
+
+def new_request_id(prefix: str) -> str:
+    """Request id unique per call: journal rows are keyed by (uid, sender, request_id)."""
+    return f"{prefix}-{int(datetime.now(timezone.utc).timestamp())}-{uuid4().hex[:8]}"
+
+
+def normalize_hash(hash_value: str) -> str:
+    """Canonical form of a hash for de-duplication: trimmed, lowercase, no 0x prefix."""
+    value = hash_value.strip().lower()
+    return value[2:] if value.startswith("0x") else value
+
 
 class StampingService:
-    def __init__(self, integ: IntegritasClient):
+    def __init__(
+        self,
+        integ: IntegritasClient,
+        poller: StatusPoller = None,
+        journal: StampJournal = None,
+        dedup_ttl: float = STAMP_DEDUP_TTL_SECONDS,
+    ):
         self.integ = integ
+        # Shared poller so concurrent waits are merged into batched status calls
+        self.poller = poller or StatusPoller(integ)
+        # Optional durable record of stamps still owed a confirmation
+        self.journal = journal
+        self.dedup_ttl = dedup_ttl
+        # Single-flight tables: normalized hash -> stamp call, uid -> proof file link call
+        self._inflight_stamps: dict[str, asyncio.Future] = {}
+        self._inflight_links: dict[str, asyncio.Future] = {}
+        self.counters = {"stamp_calls": 0, "stamps_coalesced": 0, "link_calls": 0, "links_coalesced": 0}
+
+    def stats(self) -> dict:
+        return dict(self.counters)
 
     async def stamp(self, hash_value: str, request_id: str) -> str | None:
-        return await self.integ.stamp_hash(hash_value, request_id)
+        """
+        Stamp a hash, attaching to an identical stamp that is still in flight.
 
-    async def wait_for_onchain(self, uid: str, attempts: int = POLL_MAX_ATTEMPTS, delay: int = POLL_DELAY_SECONDS, status_callback=None):
-        for attempt in range(attempts):
-            data = await self.integ.status_by_uids([uid])
-            if not data or data.get("status") != "success":
-                return {"onchain": False, "proof": "", "root": "", "address": "", "data": ""}
+        A successful stamp stays in the single-flight table for dedup_ttl seconds,
+        so chat retries and resends during that window reuse the first uid instead
+        of posting the hash again.
+        """
+        key = normalize_hash(hash_value)
+        inflight = self._inflight_stamps.get(key)
+        if inflight is not None:
+            self.counters["stamps_coalesced"] += 1
+            return await asyncio.shield(inflight)
 
-            item = data["data"][0]
-            if item.get("onchain", False):
-                return {
-                    "onchain": True,
-                    "proof": item.get("proof", ""),
-                    "root": item.get("root", ""),
-                    "address": item.get("address", ""),
-                    "data": item.get("data", "")
-                }
-            
-            # Send status update if callback provided and not the first attempt
-            if status_callback and attempt > 0:
-                await status_callback(f"Still checking on-chain confirmation... (attempt {attempt + 1}/{attempts})")
-            
-            await asyncio.sleep(delay)
+        self.counters["stamp_calls"] += 1
+        task = asyncio.ensure_future(self.integ.stamp_hash(hash_value, request_id))
+        self._inflight_stamps[key] = task
+        task.add_done_callback(lambda t: self._hold_for_ttl(key, t))
+        return await asyncio.shield(task)
+
+    def _hold_for_ttl(self, key: str, task: asyncio.Future):
+        uid = task.result() if not task.cancelled() and task.exception() is None else None
+        if not uid or self.dedup_ttl <= 0:
+            self._inflight_stamps.pop(key, None)
+            return
+        # A timer, not a status subscription: nobody may be waiting for this uid's confirmation
+        task.get_loop().call_later(self.dedup_ttl, self._release_stamp, key, task)
 
-        return {"onchain": False, "proof": "", "root": "", "address": "", "data": ""}
+    def _release_stamp(self, key: str, task: asyncio.Future):
+        if self._inflight_stamps.get(key) is task:
+            del self._inflight_stamps[key]
 
-    async def stamp_hash(self, hash_value: str, sender: str, request_id: str = None, status_callback=None) -> dict:
+    async def _proof_file_link(self, uid: str, request_id: str):
+        """get_proof_file_link for one uid, shared by concurrent callers."""
+        inflight = self._inflight_links.get(uid)
+        if inflight is not None:
+            self.counters["links_coalesced"] += 1
+            return await asyncio.shield(inflight)
+
+        self.counters["link_calls"] += 1
+        task = asyncio.ensure_future(self.integ.get_proof_file_link([uid], request_id))
+        self._inflight_links[uid] = task
+        task.add_done_callback(lambda _: self._inflight_links.pop(uid, None))
+        return await asyncio.shield(task)
+
+    async def stamp_many(self, hashes: list[str], request_id: str, max_concurrency: int = BATCH_MAX_CONCURRENCY) -> list:
+        """
+        Stamp several hashes with at most max_concurrency upstream calls in flight.
+
+        Returns:
+            list: One entry per hash, in order: the uid, None if stamping failed, or the raised exception
+        """
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def stamp_one(index: int, hash_value: str):
+            async with semaphore:
+                return await self.stamp(hash_value, f"{request_id}-{index}")
+
+        return await asyncio.gather(
+            *(stamp_one(i, h) for i, h in enumerate(hashes)), return_exceptions=True
+        )
+
+    async def wait_many(self, uids: list[str], schedule: PollSchedule = None) -> list[dict]:
+        """Wait for several uids at once; the poller checks them together in multi-uid status calls."""
+        return await asyncio.gather(*(self.wait_for_onchain(uid, schedule=schedule) for uid in uids))
+
+    async def wait_for_onchain(self, uid: str, schedule: PollSchedule = None, status_callback=None):
+        """Wait for a uid to be on-chain, polling per the schedule (settings default) until its deadline."""
+        return await self.poller.wait(uid, schedule=schedule, status_callback=status_callback)
+
+    async def current_status(self, uid: str) -> dict:
+        """Current on-chain status of a uid, checked once on the next poller tick (batched with other lookups)."""
+        return await self.poller.wait(uid, schedule=immediate_schedule())
+
+    async def current_status_many(self, uids: list[str]) -> list[dict]:
+        """current_status for several uids; checked together in multi-uid status calls on the next tick."""
+        return await asyncio.gather(*(self.current_status(uid) for uid in uids))
+
+    def subscribe(self, uid: str, callback, schedule: PollSchedule = None):
+        """Call callback(result) once the uid is on-chain or its deadline passes, without waiting here."""
+        self.poller.subscribe(uid, callback, schedule=schedule)
+
+    async def stamp_hash(self, hash_value: str, sender: str, request_id: str = None, status_callback=None, channel: str = "chat") -> dict:
         """
         Complete hash stamping workflow including validation, stamping, on-chain confirmation, and proof file link generation.
         
@@ -43,6 +132,7 @@ class StampingService:
             sender: The sender identifier (used for request_id generation if not provided)
             request_id: Optional request ID, will be generated if not provided
             status_callback: Optional callback function to send intermediate status messages
+            channel: Channel recorded in the journal, used to redeliver the confirmation after a restart
             
         Returns:
             dict: Result containing success status, messages, proof data, and download link information
@@ -60,7 +150,7 @@ class StampingService:
         
         # Generate request_id if not provided
         if not request_id:
-            request_id = f"chat-{sender[:8]}-{int(datetime.now(timezone.utc).timestamp())}"
+            request_id = new_request_id(f"chat-{sender[:8]}")
         
         # Stamp the hash
         uid = await self.stamp(hash_value, request_id)
@@ -74,10 +164,82 @@ class StampingService:
                 "filename": None
             }
         
+        if self.journal:
+            self.journal.record(uid, sender, request_id, channel, hash_value)
+
         # Send intermediate status message if callback provided
         if status_callback:
             await status_callback(f"✅ Hash stamped successfully!\n\n ⏳ Checking on‑chain confirmation...")
-        
+
+        result = await self.confirm(uid, request_id, status_callback=status_callback)
+        # Not in a finally: a stamp interrupted by shutdown must stay journaled
+        if self.journal:
+            self.journal.complete(uid, sender, request_id)
+        return result
+
+    async def stamp_hashes(self, hashes: list[str], sender: str, request_id: str = None, status_callback=None, channel: str = "chat") -> list[dict]:
+        """
+        stamp_hash for several hashes at once: stamped in parallel (up to BATCH_MAX_CONCURRENCY
+        upstream calls), then confirmed together, so the poller checks all uids in shared status calls.
+
+        Args:
+            hashes: The hashes to stamp
+            sender: The sender identifier (used for request_id generation if not provided)
+            request_id: Optional request ID prefix, will be generated if not provided
+            status_callback: Optional callback, called once after stamping with a progress message
+            channel: Channel recorded in the journal, used to redeliver the confirmations after a restart
+
+        Returns:
+            list: One stamp_hash()-shaped result per hash, in order
+        """
+        if not request_id:
+            request_id = new_request_id(f"chat-{sender[:8]}")
+
+        results: list[dict | None] = [None] * len(hashes)
+        valid = []
+        for i, hash_value in enumerate(hashes):
+            if len(hash_value) < 32:
+                results[i] = self._failure("The provided value doesn't look like a valid hash.")
+            else:
+                valid.append(i)
+
+        uids = await self.stamp_many([hashes[i] for i in valid], request_id)
+        stamped = []
+        for i, uid in zip(valid, uids):
+            if isinstance(uid, str) and uid:
+                stamped.append((i, uid))
+                if self.journal:
+                    self.journal.record(uid, sender, f"{request_id}-{i}", channel, hashes[i])
+            else:
+                results[i] = self._failure("❌ Failed to stamp hash.")
+
+        if status_callback and stamped:
+            await status_callback(f"✅ {len(stamped)} of {len(hashes)} hashes stamped successfully!\n\n ⏳ Checking on‑chain confirmation...")
+
+        confirmed = await asyncio.gather(*(self.confirm(uid, f"{request_id}-{i}") for i, uid in stamped))
+        for (i, uid), result in zip(stamped, confirmed):
+            results[i] = result
+            if self.journal:
+                self.journal.complete(uid, sender, f"{request_id}-{i}")
+        return results
+
+    @staticmethod
+    def _failure(message: str) -> dict:
+        return {"success": False, "message": message, "uid": None, "proof": None, "downloadLink": None, "filename": None}
+
+    async def confirm(self, uid: str, request_id: str, status_callback=None) -> dict:
+        """
+        Wait for an already stamped uid to be on-chain and fetch its proof file link.
+        Also used to resume journaled stamps after a restart, without stamping again.
+
+        Args:
+            uid: The uid returned by the stamp endpoint
+            request_id: Request ID forwarded to the proof file link endpoint
+            status_callback: Optional callback function to send intermediate status messages
+
+        Returns:
+            dict: Same shape as stamp_hash()
+        """
         # Wait for on-chain confirmation
         onchain = await self.wait_for_onchain(uid, status_callback=status_callback)
         
@@ -94,7 +256,7 @@ class StampingService:
             #     await status_callback(f"✅ On-chain confirmation received!\n\nGenerating proof file and download link...")
             
             try:
-                proof_file_result = await self.integ.get_proof_file_link([uid], request_id)
+                proof_file_result = await self._proof_file_link(uid, request_id)
           
                 if proof_file_result["status"] == "success":
               
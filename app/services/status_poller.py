@@ -0,0 +1,279 @@
+import asyncio
+import heapq
+import itertools
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from app.adapters.integritas_client import IntegritasClient
+from app.config.settings import POLL_BATCH_SIZE, POLL_TICK_SECONDS
+from app.services.poll_schedule import PollSchedule, build_poll_schedule
+from app.services.proof_cache import ProofCache, normalize_uid
+
+
+def not_onchain() -> dict:
+    return {"onchain": False, "proof": "", "root": "", "address": "", "data": ""}
+
+
+def status_failed() -> dict:
+    """not_onchain(), marked as coming from a failed status call rather than an answer from upstream."""
+    return {**not_onchain(), "failed": True}
+
+
+class _Waiter:
+    """A single caller waiting for a uid to land on-chain."""
+
+    def __init__(self, future: asyncio.Future, started: float, deadline: float, status_callback: Optional[Callable[[str], Awaitable[None]]]):
+        self.future = future
+        self.started = started
+        self.deadline = deadline
+        self.status_callback = status_callback
+        self.polls = 0
+
+
+class StatusPoller:
+    """
+    Central poller for /v1/timestamp/status.
+
+    Every pending uid sits in a heap ordered by the time it is next due, as given by
+    its PollSchedule. Each tick pops all due uids and checks them with one status
+    call (chunked by batch_size), then wakes the waiting callers through their
+    futures. Upstream calls therefore grow with the number of ticks, not with the
+    number of pending stamps. Uids found in the proof cache resolve immediately
+    without being polled, and every confirmation is written to it.
+    """
+
+    def __init__(
+        self,
+        integ: IntegritasClient,
+        schedule: PollSchedule = None,
+        batch_size: int = POLL_BATCH_SIZE,
+        tick_seconds: float = POLL_TICK_SECONDS,
+        cache: ProofCache = None,
+    ):
+        self.integ = integ
+        self.cache = cache
+        self.schedule = schedule or build_poll_schedule()
+        self.batch_size = max(1, batch_size)
+        self.tick_seconds = tick_seconds
+        self._heap: List[tuple] = []           # (due, seq, uid)
+        self._due: Dict[str, float] = {}       # uid -> due time of its live heap entry
+        self._schedules: Dict[str, PollSchedule] = {}
+        self._polls: Dict[str, int] = {}       # uid -> polls made so far
+        self._waiters: Dict[str, List[_Waiter]] = {}
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_tick = 0.0
+        self._callback_tasks = set()
+        # Counters
+        self.ticks = 0
+        self.status_calls = 0
+
+    def pending(self) -> int:
+        return len(self._waiters)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"pending_uids": len(self._waiters), "ticks": self.ticks, "status_calls": self.status_calls}
+
+    def watch(
+        self,
+        uid: str,
+        schedule: PollSchedule = None,
+        status_callback: Optional[Callable[[str], Awaitable[None]]] = None,
+    ) -> asyncio.Future:
+        """
+        Register interest in a uid and return a future resolving to its on-chain status.
+
+        Args:
+            uid: The uid returned by the stamp endpoint
+            schedule: Poll schedule for this uid, defaults to the poller's schedule
+            status_callback: Optional callback for intermediate status messages
+
+        Returns:
+            Future resolving to a dict with onchain, proof, root, address and data
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        cached = self.cache.get(uid) if self.cache else None
+        if cached is not None:
+            future.set_result(cached)
+            return future
+
+        schedule = schedule or self.schedule
+        now = loop.time()
+        deadline = now + schedule.deadline
+        self._waiters.setdefault(uid, []).append(_Waiter(future, now, deadline, status_callback))
+
+        # The first caller's schedule drives the uid; later callers only add their deadline
+        if uid not in self._schedules:
+            self._schedules[uid] = schedule
+            self._polls[uid] = 0
+            self._schedule(uid, now + min(schedule.next_delay(0), schedule.deadline))
+        elif uid in self._due and self._due[uid] > deadline:
+            self._schedule(uid, deadline)
+        self._ensure_running()
+        return future
+
+    async def wait(self, uid: str, **kwargs) -> dict:
+        return await self.watch(uid, **kwargs)
+
+    def subscribe(self, uid: str, callback: Callable[[dict], Awaitable[None]], schedule: PollSchedule = None):
+        """
+        Like watch(), but call callback(result) once the uid resolves instead of
+        having a coroutine parked on the future in the meantime.
+        """
+        future = self.watch(uid, schedule=schedule)
+
+        def on_done(f: asyncio.Future):
+            if f.cancelled():
+                return
+            task = asyncio.create_task(self._run_callback(uid, callback, f.result()))
+            self._callback_tasks.add(task)
+            task.add_done_callback(self._callback_tasks.discard)
+
+        future.add_done_callback(on_done)
+
+    async def _run_callback(self, uid: str, callback: Callable[[dict], Awaitable[None]], result: dict):
+        try:
+            await callback(result)
+        except Exception as e:
+            print(f"❌ Status callback for {uid} failed: {e}")
+
+    def _schedule(self, uid: str, due: float):
+        self._due[uid] = due
+        heapq.heappush(self._heap, (due, next(self._seq), uid))
+        if self._wakeup:
+            self._wakeup.set()
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while self._waiters:
+            now = loop.time()
+            next_tick = max(self._heap[0][0] if self._heap else now + self.tick_seconds,
+                            self._last_tick + self.tick_seconds)
+            if next_tick > now:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=next_tick - now)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._last_tick = now
+            due = self._pop_due(now)
+            if due:
+                try:
+                    await self._poll(due)
+                except Exception as e:
+                    print(f"❌ Status poller tick failed: {e}")
+                    for uid in due:
+                        self._reschedule(uid, loop.time())
+
+    def _pop_due(self, now: float) -> List[str]:
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            when, _, uid = heapq.heappop(self._heap)
+            # Skip entries for uids that were resolved or rescheduled since they were pushed
+            if self._due.get(uid) != when or uid not in self._waiters:
+                continue
+            del self._due[uid]
+            due.append(uid)
+        return due
+
+    async def _poll(self, uids: List[str]):
+        self.ticks += 1
+        chunks = [uids[i:i + self.batch_size] for i in range(0, len(uids), self.batch_size)]
+        responses = await asyncio.gather(*(self._fetch(chunk) for chunk in chunks))
+
+        notifications = []
+        now = asyncio.get_running_loop().time()
+        for chunk, items in zip(chunks, responses):
+            for uid in chunk:
+                if items is None:
+                    # Status call failed: report not on-chain, as the per-uid loop did
+                    self._resolve(uid, status_failed())
+                    continue
+
+                item = items.get(normalize_uid(uid))
+                if item and item.get("onchain", False):
+                    self._resolve(uid, {
+                        "onchain": True,
+                        "proof": item.get("proof", ""),
+                        "root": item.get("root", ""),
+                        "address": item.get("address", ""),
+                        "data": item.get("data", ""),
+                    })
+                    continue
+
+                notifications.extend(self._advance(uid, now))
+                self._reschedule(uid, now)
+
+        if notifications:
+            await asyncio.gather(*notifications, return_exceptions=True)
+
+    async def _fetch(self, uids: List[str]) -> Optional[Dict[str, Dict[str, Any]]]:
+        self.status_calls += 1
+        try:
+            data = await self.integ.status_by_uids(uids)
+        except Exception as e:
+            print(f"❌ Status call for {len(uids)} uids failed: {e}")
+            return None
+        if not data or data.get("status") != "success":
+            return None
+        found = [item for item in data.get("data") or [] if isinstance(item, dict)]
+        items = {normalize_uid(str(item.get("uid") or "")): item for item in found}
+        # A single-uid response is matched by position, as the per-uid loop did
+        if len(uids) == 1 and len(found) == 1:
+            items.setdefault(normalize_uid(uids[0]), found[0])
+        return items
+
+    def _advance(self, uid: str, now: float) -> List[Awaitable[None]]:
+        """Count one unsuccessful poll for each waiter; expire those past their deadline."""
+        self._polls[uid] = self._polls.get(uid, 0) + 1
+        notifications = []
+        remaining = []
+        for waiter in self._waiters.get(uid, []):
+            if waiter.future.done():
+                continue
+            waiter.polls += 1
+            if now >= waiter.deadline:
+                waiter.future.set_result(not_onchain())
+                continue
+            if waiter.status_callback and waiter.polls > 1:
+                notifications.append(waiter.status_callback(
+                    f"Still checking on-chain confirmation... ({int(now - waiter.started)}s elapsed)"
+                ))
+            remaining.append(waiter)
+
+        if remaining:
+            self._waiters[uid] = remaining
+        else:
+            self._forget(uid)
+        return notifications
+
+    def _reschedule(self, uid: str, now: float):
+        waiters = self._waiters.get(uid)
+        if not waiters:
+            return
+        schedule = self._schedules.get(uid, self.schedule)
+        due = now + schedule.next_delay(self._polls.get(uid, 0))
+        # Make sure the last poll happens at the earliest deadline, not after it
+        self._schedule(uid, min(due, min(w.deadline for w in waiters)))
+
+    def _resolve(self, uid: str, result: dict):
+        if self.cache and result["onchain"]:
+            self.cache.put(uid, result)
+        for waiter in self._waiters.get(uid, []):
+            if not waiter.future.done():
+                waiter.future.set_result(dict(result))
+        self._forget(uid)
+
+    def _forget(self, uid: str):
+        self._waiters.pop(uid, None)
+        self._schedules.pop(uid, None)
+        self._polls.pop(uid, None)
+        self._due.pop(uid, None)
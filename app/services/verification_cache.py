@@ -0,0 +1,87 @@
+import copy
+import hashlib
+import json
+import re
+import time
+from typing import Any, Dict, Optional
+
+from app.config.settings import VERIFY_CACHE_SIZE, VERIFY_CACHE_TTL_SECONDS, VERIFY_REPORT_LINK_TTL_SECONDS
+from app.services.cache import LRUCache
+
+_HEX = re.compile(r"0x[0-9a-fA-F]+")
+
+
+class VerificationCache:
+    """
+    Verification results keyed by a digest of (proof, root, address, data).
+
+    The on-chain result of a proof does not change, but the PDF report link in
+    data.file.download_url only lives for an hour. The link's expiry is therefore
+    tracked separately from the entry itself: callers can tell a fully fresh hit
+    from one that only needs its report link replaced.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = VERIFY_CACHE_SIZE,
+        ttl: float = VERIFY_CACHE_TTL_SECONDS,
+        link_ttl: float = VERIFY_REPORT_LINK_TTL_SECONDS,
+    ):
+        self.entries = LRUCache(maxsize, ttl=ttl)
+        self.link_ttl = link_ttl
+        self.link_refreshes = 0
+
+    @staticmethod
+    def key(proof: str, root: str, address: str, data: str) -> str:
+        raw = json.dumps([_key_part(proof), _key_part(root), _key_part(address), _key_part(data)])
+        return hashlib.sha3_256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Look up a cached verification
+
+        Returns:
+            None on a miss, otherwise {"result": <verify response>, "link_fresh": bool}
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        link_fresh = entry["link_expires_at"] is not None and entry["link_expires_at"] > time.monotonic()
+        return {"result": copy.deepcopy(entry["result"]), "link_fresh": link_fresh}
+
+    def put(self, key: str, result: Dict[str, Any]):
+        """Cache a successful verify response; its report link is assumed fresh from now."""
+        if not result or result.get("status") != "success":
+            return
+        self.entries.set(key, {
+            "result": copy.deepcopy(result),
+            "link_expires_at": time.monotonic() + self.link_ttl if report_file(result) else None,
+        })
+
+    def refresh_link(self, key: str, file: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Swap in a new report file/link for a cached entry and return the updated result."""
+        entry = self.entries.peek(key)
+        if entry is None:
+            return None
+        entry["result"].setdefault("data", {})["file"] = copy.deepcopy(file)
+        entry["link_expires_at"] = time.monotonic() + self.link_ttl
+        self.link_refreshes += 1
+        return copy.deepcopy(entry["result"])
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.entries.stats(), "link_refreshes": self.link_refreshes}
+
+
+def report_file(result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """The data.file block (download_url etc.) of a verify response, if any."""
+    try:
+        file = result["data"]["file"]
+    except (KeyError, TypeError):
+        return None
+    return file if isinstance(file, dict) and file.get("download_url") else None
+
+
+def _key_part(value: str) -> str:
+    """The stripped value; hex is lowercased so 0xAB and 0xab share an entry, anything else is kept exact."""
+    value = value.strip()
+    return value.lower() if _HEX.fullmatch(value) else value
@@ -1,103 +1,229 @@
 from app.adapters.integritas_client import IntegritasClient
-import json
-import base64
+from app.config.settings import PROOF_PRECHECK, VERIFY_BATCH_CONCURRENCY, VERIFY_BATCH_SIZE
+from app.services.mmr_proof import ProofRejected, check_proof_structure
+from app.services.verification_cache import VerificationCache, report_file
+from app.services.proof_file import ProofFileError, iter_proof_entries
+import asyncio
+from typing import Iterable, Iterator
 
 class VerificationService:
-    def __init__(self, integ: IntegritasClient):
+    def __init__(self, integ: IntegritasClient, cache: VerificationCache = None, precheck: str = PROOF_PRECHECK):
+        if precheck not in ("off", "structural"):
+            raise ValueError(f"Unknown proof precheck {precheck!r}, expected 'off' or 'structural'")
         self.integ = integ
+        self.cache = cache
+        self.precheck = precheck
+        self.counters = {"local_rejections": 0, "upstream_calls": 0}
+        # (cache key, report) -> in-flight upstream verify, so concurrent identical requests share one call
+        self._inflight: dict[tuple[str, bool], asyncio.Future] = {}
 
     def is_proof_file(self, file_data: dict) -> bool:
         """
         Check if uploaded file is a valid proof file with required JSON structure.
-        Returns True if it's a valid proof file, False otherwise.
+        Only the start of the file is decoded and parsed, up to the first entry.
         """
-        # print(f"Step 1: Checking if uploaded file is a proof file...")
-        
         try:
-            # Check if it's a JSON file
-            if file_data.get("mime_type") != "application/json":
-                # print(f"File is not JSON (mime_type: {file_data.get('mime_type')})")
-                return False
-            
-            # Parse the JSON content (handle base64 encoding)
-            contents = file_data.get("contents", "")
-            if isinstance(contents, bytes):
-                contents = contents.decode('utf-8')
-            
-            # Check if content is base64 encoded
-            try:
-                # Try to decode base64 first
-                decoded_content = base64.b64decode(contents).decode('utf-8')
-                # print(f"Content was base64 encoded, decoded successfully")
-                contents = decoded_content
-            except:
-                # If base64 decode fails, assume it's plain text
-                print(f"Content is not base64 encoded, using as-is")
-            
-            # print(f"File contents: {contents[:200]}...")  # Print first 200 chars
-            
-            data = json.loads(contents)
-            # print(f"JSON parsed successfully: {type(data)}")
-            
-            # Check if it's a list
-            if not isinstance(data, list):
-                print("JSON is not a list")
-                return False
-            
-            # Check if list has at least one item
-            if len(data) == 0:
-                print("JSON list is empty")
-                return False
-            
-            # Check first item has required properties
-            first_item = data[0]
-            required_props = ["address", "data", "proof", "root"]
-            
-            for prop in required_props:
-                if prop not in first_item:
-                    print(f"Missing required property: {prop}")
-                    return False
-            
-            print(f"✅ File is a valid proof file with {len(data)} proof(s)")
+            next(iter_proof_entries(file_data))
             return True
-            
-        except json.JSONDecodeError as e:
-            print(f"❌ Invalid JSON: {e}")
-            return False
-        except Exception as e:
-            print(f"❌ Error checking proof file: {e}")
+        except ProofFileError as e:
+            print(f"❌ Not a proof file: {e}")
             return False
 
     def parse_proof_file(self, file_data: dict) -> dict:
         """
         Parse a proof file and return the first proof data.
-        Assumes the file has already been validated by is_proof_file().
+
+        Raises:
+            ProofFileError: When the file is not a proof file
+        """
+        return next(iter_proof_entries(file_data))
+
+    def iter_proof_entries(self, file_data: dict) -> Iterator[dict]:
+        """
+        All proof entries of a proof file, validated and parsed in one streaming pass.
+
+        Raises:
+            ProofFileError: While iterating, as soon as the file turns out not to be a proof file
+        """
+        return iter_proof_entries(file_data)
+
+    def stats(self) -> dict:
+        return dict(self.counters)
+
+    def precheck_proof(self, proof: str, root: str, address: str, data: str):
         """
-        print(f"Step 4: Parsing proof file to extract verification data...")
-        
+        Local structural check of a proof before any upstream call (see mmr_proof.check_proof_structure)
+
+        Raises:
+            ProofRejected: When the proof is malformed
+        """
+        if self.precheck == "off":
+            return
         try:
-            contents = file_data.get("contents", "")
-            if isinstance(contents, bytes):
-                contents = contents.decode('utf-8')
-            
-            # Handle base64 encoding
-            try:
-                decoded_content = base64.b64decode(contents).decode('utf-8')
-                print(f"Content was base64 encoded, decoded successfully")
-                contents = decoded_content
-            except:
-                print(f"Content is not base64 encoded, using as-is")
-            
-            proof_data = json.loads(contents)
-            first_proof = proof_data[0]  # Use the first proof in the list
-            
-            print(f"✅ Successfully extracted proof data: {first_proof}")
-            return first_proof
-            
-        except Exception as e:
-            print(f"❌ Error parsing proof file: {e}")
-            raise e
-
-    async def verify(self, proof: str, root: str, address: str, data: str, request_id: str):
+            check_proof_structure(proof, root, address, data)
+        except ValueError:
+            self.counters["local_rejections"] += 1
+            raise
+
+    async def verify(self, proof: str, root: str, address: str, data: str, request_id: str, report: bool = True):
+        """
+        Verify one proof on-chain, through the cache
+
+        Args:
+            report: Also have Integritas generate the PDF report (data.file). Without it
+                the call is much faster and the result carries no report link. A later
+                call with report=True keeps the cached result and only fetches the link.
+
+        Raises:
+            ProofRejected: When the local precheck fails; nothing is sent upstream
+        """
+        self.precheck_proof(proof, root, address, data)
         payload = [{"proof": proof, "root": root, "address": address, "data": data}]
-        return await self.integ.verify_proof(payload, request_id)
+        if not self.cache:
+            self.counters["upstream_calls"] += 1
+            return await self.integ.verify_proof(payload, request_id, report=report)
+
+        key = self.cache.key(proof, root, address, data)
+        cached = self.cache.get(key)
+        if cached and cached["link_fresh"]:
+            return cached["result"]
+        if cached and not report:
+            # The result alone is enough; never hand out an expired report link
+            (cached["result"].get("data") or {}).pop("file", None)
+            return cached["result"]
+
+        result = await self._verify_once(key, payload, request_id, report)
+        if not cached:
+            self.cache.put(key, result)
+            return result
+
+        # Cached result with an expired report link: keep the result, only take the new link.
+        # The API has no report-only endpoint, so the link comes from the same verify call.
+        file = report_file(result) if result else None
+        if not file:
+            return cached["result"]
+        return self.cache.refresh_link(key, file) or result
+
+    async def verify_many(
+        self,
+        entries: Iterable[dict],
+        request_id: str,
+        chunk_size: int = VERIFY_BATCH_SIZE,
+        max_concurrency: int = VERIFY_BATCH_CONCURRENCY,
+        report: bool = True,
+    ) -> dict:
+        """
+        Verify every entry of a proof file with one upstream call per chunk of entries
+
+        Entries are consumed as they come (e.g. from iter_proof_entries), so only
+        the chunks in flight are held in memory. Entries that fail the local
+        precheck are never sent. The rest go out in chunks of chunk_size (at most
+        max_concurrency calls in flight), and each chunk's result is mapped back to
+        its entries through the matched hashes in blockchain_data.
+
+        Returns:
+            Aggregated report: {"total", "matched", "unmatched", "rejected", "failed",
+            "items": [{"index", "data", "status", "error", "block_date"}], "reports": [download urls]}
+        """
+        chunk_size = max(1, chunk_size)
+        items = []
+        reports = []
+        pending = []
+        chunk = []
+
+        def settle(chunk: list, result):
+            if isinstance(result, BaseException) or not result:
+                error = f"{result.__class__.__name__}" if isinstance(result, BaseException) else "Verify failed (empty report)"
+                for item, _ in chunk:
+                    item.update(status="error", error=error)
+                return
+            file = report_file(result)
+            if file:
+                reports.append(file["download_url"])
+            outcome, blocks = _verification_outcome(result)
+            dates = {_normalize_hex(b.get("matched_hash", "")): b.get("block_date") for b in blocks}
+            for item, payload in chunk:
+                key = _normalize_hex(payload["data"])
+                matched = key in dates if dates else outcome in ("full match", "exact match")
+                item.update(status="match" if matched else "no match", block_date=dates.get(key))
+
+        async def verify_chunk(n: int, chunk: list):
+            self.counters["upstream_calls"] += 1
+            try:
+                result = await self.integ.verify_proof([payload for _, payload in chunk], f"{request_id}-{n}", report=report)
+            except Exception as e:
+                result = e
+            settle(chunk, result)
+
+        async def submit(n: int, chunk: list):
+            # Keep at most max_concurrency chunks in flight before reading further
+            if len(pending) >= max(1, max_concurrency):
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    pending.remove(task)
+            pending.append(asyncio.ensure_future(verify_chunk(n, chunk)))
+
+        chunks_sent = 0
+        try:
+            for index, entry in enumerate(entries):
+                item = {"index": index, "data": entry.get("data"), "status": None, "error": None, "block_date": None}
+                items.append(item)
+                missing = [k for k in ("data", "root", "address", "proof") if not entry.get(k)]
+                if missing:
+                    item.update(status="rejected", error=f"Missing keys: {', '.join(missing)}")
+                    continue
+                try:
+                    self.precheck_proof(entry["proof"], entry["root"], entry["address"], entry["data"])
+                except ProofRejected as e:
+                    item.update(status="rejected", error=str(e))
+                    continue
+                chunk.append((item, {k: entry[k] for k in ("proof", "root", "address", "data")}))
+                if len(chunk) >= chunk_size:
+                    await submit(chunks_sent, chunk)
+                    chunks_sent += 1
+                    chunk = []
+            if chunk:
+                await submit(chunks_sent, chunk)
+            if pending:
+                await asyncio.gather(*pending)
+        except BaseException:
+            for task in pending:
+                task.cancel()
+            raise
+
+        count = lambda status: sum(1 for item in items if item["status"] == status)
+        return {
+            "total": len(items),
+            "matched": count("match"),
+            "unmatched": count("no match"),
+            "rejected": count("rejected"),
+            "failed": count("error"),
+            "items": items,
+            "reports": reports,
+        }
+
+    async def _verify_once(self, key: str, payload: list[dict], request_id: str, report: bool = True):
+        # A call with a report also serves callers that don't need one, not the other way round
+        inflight = self._inflight.get((key, True)) or (None if report else self._inflight.get((key, False)))
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+        self.counters["upstream_calls"] += 1
+        task = asyncio.ensure_future(self.integ.verify_proof(payload, request_id, report=report))
+        self._inflight[(key, report)] = task
+        task.add_done_callback(lambda _: self._inflight.pop((key, report), None))
+        return await asyncio.shield(task)
+
+
+def _normalize_hex(value: str) -> str:
+    value = str(value).strip().lower()
+    return value[2:] if value.startswith("0x") else value
+
+
+def _verification_outcome(result: dict) -> tuple[str | None, list[dict]]:
+    """(result string, blockchain_data) of a verify response, in either of the documented layouts."""
+    data = result.get("data") or {}
+    for body in (data.get("verification"), data.get("response")):
+        if isinstance(body, dict):
+            inner = body.get("data") if isinstance(body.get("data"), dict) else body
+            return inner.get("result"), inner.get("blockchain_data") or []
+    return None, []
@@ -0,0 +1,6 @@
+import os
+
+# app.config.settings refuses to load without these; the tests never reach the real services
+os.environ.setdefault("ASI_API_KEY", "test")
+os.environ.setdefault("INTEGRITAS_API_KEY", "test")
+os.environ.setdefault("AGENT_PORT", "8000")
@@ -0,0 +1,95 @@
+import pytest
+
+from app.services import cache as cache_module
+from app.services.cache import LRUCache
+from app.services.proof_cache import ProofCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+
+def proof(n):
+    return {"onchain": True, "proof": f"0x{n:02X}", "root": "0x01", "address": "0xFFEEDD", "data": "0x02"}
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now the least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_ttl_expires_entries(clock):
+    cache = LRUCache(10, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=600)
+    clock.now += 59
+    assert cache.get("a") == 1
+    clock.now += 1
+    assert cache.get("a") is None
+    assert cache.peek("b") == 2
+    assert len(cache) == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_peek_does_not_touch_recency_or_counters():
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.peek("a") == 1
+    cache.set("c", 3)
+    assert cache.peek("a") is None
+    assert cache.stats()["hits"] == 0
+
+
+def test_proof_cache_memory_is_bounded_with_disk_fallback(tmp_path):
+    store = ProofCache(str(tmp_path / "proofs.sqlite3"), memory_size=2)
+    for n in range(5):
+        store.put(f"0xuid{n}", proof(n))
+    assert len(store.memory) == 2
+    assert store.get("0xuid0") == proof(0)
+    stats = store.stats()
+    assert (stats["disk_hits"], stats["evictions"]) == (1, 4)  # the disk hit was promoted to memory
+    assert store.get("0xuid0") == proof(0)
+    assert store.stats()["memory_hits"] == 1
+    store.close()
+
+
+def test_proof_cache_normalizes_uids_and_persists(tmp_path):
+    path = str(tmp_path / "proofs.sqlite3")
+    store = ProofCache(path, memory_size=2)
+    store.put(" 0xabc ", proof(1))
+    store.close()
+
+    reopened = ProofCache(path, memory_size=2)
+    assert reopened.get("0XABC") == proof(1)
+    reopened.close()
+
+
+def test_proof_cache_ignores_pending_results(tmp_path):
+    store = ProofCache(str(tmp_path / "proofs.sqlite3"), memory_size=2)
+    store.put("0xabc", {"onchain": False, "proof": "", "root": "", "address": "", "data": ""})
+    assert store.get("0xabc") is None
+    assert store.stats()["misses"] == 1
+    # Callers get a copy, not the cached entry
+    store.put("0xdef", proof(2))
+    store.get("0xdef")["proof"] = "tampered"
+    assert store.get("0xdef") == proof(2)
+    store.close()
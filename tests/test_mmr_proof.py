@@ -0,0 +1,43 @@
+import pytest
+
+from app.services.mmr_proof import ProofRejected, check_proof_structure, parse_proof
+
+# Confirmed stamps from app/integritas_docs.py and app/clientBdev.py
+KNOWN_PROOFS = [
+    {
+        "address": "0xFFEEDD",
+        "data": "0xC74C4DDE95A49EAFDBA139568E9955C65E017B55662132FA824AF58E6E782427",
+        "proof": "0x000100000100",
+        "root": "0x894D4D9B47C622BAD8D77A78871B25FA699523D9BE3B0AA70485814A00A90BD6",
+    },
+    {
+        "address": "0xFFEEDD",
+        "data": "0x4dd7cac4f6d591d0283d5a6c18ac1b8cb9294de94253f59a004fd6b721cfe7cf",
+        "proof": "0x000100000100",
+        "root": "0xDAD7F057C70DE3BC4756AB871836CB0BF1128EDB63025AD2587167EE683564D3",
+    },
+]
+
+
+@pytest.mark.parametrize("item", KNOWN_PROOFS)
+def test_known_proofs_pass(item):
+    parsed = check_proof_structure(item["proof"], item["root"], item["address"], item["data"])
+    assert parsed.chunks == []
+
+
+@pytest.mark.parametrize("proof", ["0x0001000001", "0x00010000010000", "0x0001000101", "0xZZ", "0x000"])
+def test_malformed_proofs_rejected(proof):
+    with pytest.raises(ProofRejected):
+        parse_proof(proof)
+
+
+def test_non_hex_field_rejected():
+    item = dict(KNOWN_PROOFS[0], root="not hex")
+    with pytest.raises(ProofRejected, match="'root'"):
+        check_proof_structure(item["proof"], item["root"], item["address"], item["data"])
+
+
+def test_root_is_not_recomputed():
+    # Structural only: a well-formed proof paired with another item's root still passes locally
+    item = dict(KNOWN_PROOFS[0], root=KNOWN_PROOFS[1]["root"])
+    check_proof_structure(item["proof"], item["root"], item["address"], item["data"])
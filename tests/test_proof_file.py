@@ -0,0 +1,45 @@
+import base64
+import json
+import random
+
+import pytest
+
+from app.services.proof_file import ProofFileError, iter_json_array, iter_proof_entries
+
+
+def _chunks(text: str, size: int):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+@pytest.mark.parametrize("chunks, expected", [
+    (["[25.", "0]"], [25.0]),
+    (["[1e", "5]"], [1e5]),
+    (["[1E+", "2]"], [1e2]),
+    (["[1e-", "2, 3]"], [1e-2, 3]),
+    (["[-", "7]"], [-7]),
+    (["[12", "34]"], [1234]),
+    (["[tr", "ue, nu", "ll]"], [True, None]),
+])
+def test_values_split_across_chunks(chunks, expected):
+    assert list(iter_json_array(chunks)) == expected
+
+
+def test_every_chunk_boundary_matches_json_loads():
+    rng = random.Random(7)
+    values = [rng.choice([0, -3, 25.5, 1e-7, -2.5e12, 123456789, True, False, None, "x,y]", {"a": [1.5, "0x0F"]}]) for _ in range(60)]
+    text = json.dumps(values, separators=(",", ":"))
+    for size in range(1, 12):
+        assert list(iter_json_array(_chunks(text, size))) == json.loads(text), size
+
+
+def test_proof_entries_from_base64_upload():
+    entries = [{"address": "0xFFEEDD", "data": f"0x{i:064X}", "proof": "0x000100000100", "root": "0x01"} for i in range(250)]
+    contents = base64.b64encode(json.dumps(entries).encode()).decode()
+    upload = {"mime_type": "application/json", "contents": contents}
+    assert list(iter_proof_entries(upload, chunk_size=64)) == entries
+
+
+@pytest.mark.parametrize("contents", ["{}", "[]", "[1]", '[{"address": "0x01"}]', '[{"address":1,"data":1,"proof":1,"root":1} 2]'])
+def test_not_a_proof_file(contents):
+    with pytest.raises(ProofFileError):
+        list(iter_proof_entries({"mime_type": "application/json", "contents": contents}))
@@ -0,0 +1,199 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.adapters import resilience as resilience_module
+from app.adapters.resilience import Bulkhead, CircuitBreaker, CircuitOpenError, OverloadedError, Resilience
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience_module.time, "monotonic", clock)
+    return clock
+
+
+class FakeResilience(Resilience):
+    """Fixed backoff; sleeping only moves the fake clock forward."""
+
+    def __init__(self, clock, delay=1.0, **kwargs):
+        super().__init__("test", **kwargs)
+        self.clock = clock
+        self.delay = delay
+        self.slept = []
+
+    def backoff(self, attempt):
+        return self.delay
+
+    async def _sleep(self, delay):
+        self.retries += 1
+        self.slept.append(delay)
+        self.clock.now += delay
+
+
+def sender(*outcomes):
+    """send() returning or raising the given outcomes in turn; the last one repeats."""
+    calls = []
+
+    async def send():
+        outcome = outcomes[min(len(calls), len(outcomes) - 1)]
+        calls.append(outcome)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return httpx.Response(outcome, headers={"retry-after": "2"} if outcome == 429 else None)
+
+    return send, calls
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_breaker_opens_then_half_opens_and_closes(clock):
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=30)
+    for _ in range(2):
+        breaker.before_call()
+        breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    clock.now += 30
+    breaker.before_call()
+    assert breaker.state == "half_open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # only one trial call at a time
+    breaker.record_success()
+    assert breaker.state == "closed" and breaker.consecutive_failures == 0
+    assert breaker.stats()["opened"] == 1
+
+
+def test_failed_trial_reopens(clock):
+    breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=30)
+    breaker.before_call()
+    breaker.record_failure()
+    clock.now += 30
+    breaker.before_call()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_retries_transport_errors_then_succeeds(clock):
+    r = FakeResilience(clock, attempts=3, retry_budget=60)
+    send, calls = sender(httpx.ConnectError("down"), 503, 200)
+    assert run(r.call("status", send)).status_code == 200
+    assert len(calls) == 3 and r.retries == 2
+    assert r.breaker("status").consecutive_failures == 0
+
+
+def test_non_idempotent_call_is_not_retried(clock):
+    r = FakeResilience(clock, attempts=3)
+    send, calls = sender(503)
+    assert run(r.call("stamp", send, idempotent=False)).status_code == 503
+    assert len(calls) == 1
+
+
+def test_pool_timeout_is_not_retried_or_counted(clock):
+    r = FakeResilience(clock, attempts=3, failure_threshold=1)
+    send, calls = sender(httpx.PoolTimeout("no free connection"))
+    with pytest.raises(httpx.PoolTimeout):
+        run(r.call("verify", send))
+    assert len(calls) == 1
+    assert r.breaker("verify").state == "closed"
+    assert r.breaker("verify").counters["failures"] == 0
+
+
+def test_read_timeout_not_retried_when_disabled(clock):
+    r = FakeResilience(clock, attempts=3)
+    send, calls = sender(httpx.ReadTimeout("slow"))
+    with pytest.raises(httpx.ReadTimeout):
+        run(r.call("verify", send, retry_timeouts=False))
+    assert len(calls) == 1
+    assert r.breaker("verify").counters["failures"] == 1
+
+    send, calls = sender(httpx.ReadTimeout("slow"))
+    with pytest.raises(httpx.ReadTimeout):
+        run(r.call("status", send))
+    assert len(calls) == 3
+
+
+@pytest.mark.parametrize("budget, expected_calls", [(0, 1), (1, 2), (2.5, 3), (60, 5)])
+def test_retry_budget_caps_total_time(clock, budget, expected_calls):
+    r = FakeResilience(clock, delay=1.0, attempts=5, retry_budget=budget)
+    send, calls = sender(500)
+    assert run(r.call("status", send)).status_code == 500
+    assert len(calls) == expected_calls
+    assert sum(r.slept) <= budget
+
+
+def test_retry_budget_counts_time_spent_in_calls(clock):
+    r = FakeResilience(clock, delay=1.0, attempts=5, retry_budget=10)
+
+    async def slow_failure():
+        clock.now += 6
+        raise httpx.ReadTimeout("slow")
+
+    with pytest.raises(httpx.ReadTimeout):
+        run(r.call("status", slow_failure))
+    # 6 s + 1 s backoff fits, a third attempt would start after 13 s
+    assert r.retries == 1
+
+
+def test_retry_after_replaces_backoff_unless_too_long(clock):
+    r = FakeResilience(clock, attempts=2, retry_after_max=5)
+    send, calls = sender(429, 200)
+    assert run(r.call("status", send)).status_code == 200
+    assert r.slept == [2.0]
+
+    r = FakeResilience(clock, attempts=2, retry_after_max=1)
+    send, calls = sender(429, 200)
+    assert run(r.call("status", send)).status_code == 429
+    assert len(calls) == 1
+
+
+def test_bulkhead_turns_away_when_queue_is_full():
+    async def main():
+        bulkhead = Bulkhead("verify", max_in_flight=1, max_queue=1, queue_timeout=5)
+        release = asyncio.Event()
+
+        async def hold():
+            async with bulkhead.slot():
+                await release.wait()
+
+        holder = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        waiter = asyncio.create_task(hold())
+        await asyncio.sleep(0)
+        with pytest.raises(OverloadedError):
+            async with bulkhead.slot():
+                pass
+        release.set()
+        await asyncio.gather(holder, waiter)
+        return bulkhead.stats()
+
+    stats = run(main())
+    assert (stats["admitted"], stats["rejected_full"], stats["in_flight"]) == (2, 1, 0)
+
+
+def test_bulkhead_queue_timeout():
+    async def main():
+        bulkhead = Bulkhead("verify", max_in_flight=1, max_queue=4, queue_timeout=0.01)
+        async with bulkhead.slot():
+            with pytest.raises(OverloadedError):
+                async with bulkhead.slot():
+                    pass
+        return bulkhead.stats()
+
+    stats = run(main())
+    assert stats["timed_out"] == 1 and stats["queued"] == 0
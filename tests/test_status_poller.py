@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from app.services.poll_schedule import PollSchedule
+from app.services.proof_cache import ProofCache
+from app.services.status_poller import StatusPoller
+
+
+class FakeIntegritas:
+    """status_by_uids answering from a script: uid -> item, or a whole response."""
+
+    def __init__(self, onchain=(), response=None, echo_uid=lambda uid: uid.strip().upper()):
+        self.onchain = set(onchain)
+        self.response = response
+        self.echo_uid = echo_uid
+        self.calls = []
+
+    async def status_by_uids(self, uids):
+        self.calls.append(list(uids))
+        if self.response is not None:
+            return self.response(uids)
+        return {"status": "success", "data": [
+            {"uid": self.echo_uid(uid), "onchain": uid in self.onchain, "proof": "0x01", "root": "0x02",
+             "address": "0xFFEEDD", "data": "0x03"} if uid in self.onchain else {"uid": self.echo_uid(uid), "onchain": False}
+            for uid in uids
+        ]}
+
+
+def schedule(deadline=1.0):
+    return PollSchedule(initial_delay=0, base_delay=0.01, max_delay=0.01, jitter=0, deadline=deadline)
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.mark.parametrize("uid", ["0xabc123", " 0xABC123 ", "0xAbC123"])
+def test_uid_matches_upstream_case(uid):
+    integ = FakeIntegritas(onchain={uid})
+
+    async def main():
+        poller = StatusPoller(integ, schedule=schedule(), tick_seconds=0.001)
+        return await poller.wait(uid)
+
+    result = run(main())
+    assert result["onchain"] and result["proof"] == "0x01"
+    assert len(integ.calls) == 1
+
+
+def test_single_uid_falls_back_to_position():
+    integ = FakeIntegritas(onchain={"0xabc"}, echo_uid=lambda uid: "something-else")
+
+    async def main():
+        return await StatusPoller(integ, schedule=schedule(), tick_seconds=0.001).wait("0xabc")
+
+    assert run(main())["onchain"]
+
+
+def test_batched_uids_resolve_by_uid_not_position():
+    uids = ["0xa1", "0xb2", "0xc3"]
+    # Reversed order: a positional match would give every uid the wrong item
+    integ = FakeIntegritas(onchain={"0xb2"})
+    respond = integ.status_by_uids
+
+    async def reversed_response(batch):
+        data = await respond(batch)
+        return {"status": "success", "data": data["data"][::-1]}
+
+    integ.status_by_uids = reversed_response
+
+    async def main():
+        poller = StatusPoller(integ, schedule=schedule(deadline=0.05), tick_seconds=0.001)
+        return await asyncio.gather(*(poller.wait(uid) for uid in uids))
+
+    results = run(main())
+    assert [r["onchain"] for r in results] == [False, True, False]
+    assert integ.calls[0] == uids
+
+
+def test_deadline_reports_not_onchain():
+    integ = FakeIntegritas()
+
+    async def main():
+        loop = asyncio.get_running_loop()
+        poller = StatusPoller(integ, schedule=schedule(deadline=0.1), tick_seconds=0.001)
+        started = loop.time()
+        result = await poller.wait("0xpending")
+        return result, loop.time() - started, poller.pending()
+
+    result, elapsed, pending = run(main())
+    assert result == {"onchain": False, "proof": "", "root": "", "address": "", "data": ""}  # not "failed"
+    assert 0.1 <= elapsed < 1.0
+    assert pending == 0
+    assert len(integ.calls) > 1
+
+
+def _raise(uids):
+    raise RuntimeError("circuit open")
+
+
+@pytest.mark.parametrize("response", [lambda uids: None, lambda uids: {"status": "error", "message": "boom"}, _raise])
+def test_failed_status_call_reports_not_onchain(response):
+    # status_by_uids returns None for a non-200 response
+    integ = FakeIntegritas(response=response)
+
+    async def main():
+        poller = StatusPoller(integ, schedule=schedule(deadline=60), tick_seconds=0.001)
+        return await asyncio.wait_for(poller.wait("0xabc"), 5), poller.pending()
+
+    result, pending = run(main())
+    assert not result["onchain"] and result["failed"]
+    assert pending == 0
+    assert len(integ.calls) == 1
+
+
+def test_cached_proof_skips_polling(tmp_path):
+    cache = ProofCache(str(tmp_path / "proofs.sqlite3"), memory_size=4)
+    cache.put("0XABC", {"onchain": True, "proof": "0x01", "root": "0x02", "address": "0x03", "data": "0x04"})
+    integ = FakeIntegritas()
+
+    async def main():
+        return await StatusPoller(integ, schedule=schedule(), cache=cache).wait(" 0xabc")
+
+    assert run(main())["proof"] == "0x01"
+    assert integ.calls == []
+    cache.close()